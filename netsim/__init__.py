@@ -0,0 +1,8 @@
+"""
+Network simulator: random switch networks, link cut experiments and the tools around their data.
+
+Importing the package, or any module of it, never imports Mininet: simulator.py loads mininetBackend.py only when a
+simulation runs with BACKEND = "mininet". Run the command line tools with python -m netsim <command>, see
+__main__.py.
+
+"""
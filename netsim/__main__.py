@@ -0,0 +1,48 @@
+"""
+Command line entry point of the netsim package.
+
+Usage:
+    python -m netsim <command> [arguments ...]
+
+Commands:
+    generate       simulate networks and write dataWLatency files          (simulator.py)
+    decode         print or merge the records of data files                (dataDecoder.py)
+    convert        convert dataWLatency*.csv files to .nsd shards          (dataFormat.py)
+    bench          benchmark topology generation, writing and decoding     (bench.py)
+    sweep          run the simulator over a grid of parameters             (sweep.py)
+    index          build the random access indexes of data files           (shardIndex.py)
+    export         export data files as padded .npy batches                (tensorExport.py)
+    cache          print the diversity report of topology caches           (topologyCache.py)
+    controllers    run stand-in OpenFlow controllers for testing           (controllerPool.py)
+
+Each command imports only its own module when it runs, so commands that do not simulate start without Mininet.
+python -m netsim <command> --help lists a command's arguments.
+
+"""
+
+import importlib
+import sys
+
+COMMANDS = {"generate": "simulator",
+            "decode": "dataDecoder",
+            "convert": "dataFormat",
+            "bench": "bench",
+            "sweep": "sweep",
+            "index": "shardIndex",
+            "export": "tensorExport",
+            "cache": "topologyCache",
+            "controllers": "controllerPool"}
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv or argv[0] not in COMMANDS:
+        sys.stderr.write(__doc__.strip() + "\n")
+        return 0 if argv and argv[0] in ("-h", "--help") else 2
+    sys.argv[0] = "netsim " + argv[0]
+    return importlib.import_module("netsim." + COMMANDS[argv[0]]).main(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
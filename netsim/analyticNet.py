@@ -0,0 +1,267 @@
+"""
+Analytical stand-in for SimNet (Mininet) used by simulator.py to produce samples without an emulated network.
+
+AnalyticNet accepts the same calls the Simulator makes on a Mininet network (addController, addSwitch, addHost,
+addLink, build, configLinkStatus, stop, ping, probeHosts, startTraffic) and answers probes from the topology:
+    - packets follow the lowest delay path between two hosts over the links that are up,
+    - every link adds its configured delay each way,
+    - every link drops each packet with its configured loss percentage,
+    - every link adds a queueing delay, drawn per packet from an exponential distribution whose mean grows with the
+      number of active traffic flows crossing the link, up to max_queue_size packets.
+Time is simulated: sleep() advances the network's clock instead of waiting, so a whole simulation takes as long as
+computing it.
+
+"""
+
+import heapq
+import math
+import random
+
+PACKET_SIZE = 1500  # bytes, used for the per link service time
+HOST_DELAY = 0.05  # ms added to each ping by the end hosts
+
+
+def _milliseconds(delay):
+    if delay is None:
+        return 0.0
+    if isinstance(delay, str):
+        delay = delay.strip()
+        for unit, scale in (("ms", 1.0), ("us", 0.001), ("s", 1000.0)):
+            if delay.endswith(unit):
+                return float(delay[:-len(unit)]) * scale
+    return float(delay)
+
+
+# shortestPaths( adjacency, source )
+#
+# Purpose: Dijkstra from source. adjacency maps each node to a list of (neighbour, weight, link) tuples.
+# Returns (dist, parent) dicts, where parent[node] is the (previous node, link) on the path to node.
+#
+def shortestPaths(adjacency, source):
+    dist = {source: 0.0}
+    parent = {source: None}
+    heap = [(0.0, 0, source)]
+    order = 1
+    done = set()
+    while heap:
+        d, _, node = heapq.heappop(heap)
+        if node in done:
+            continue
+        done.add(node)
+        for neighbour, weight, link in adjacency.get(node, ()):
+            nd = d + weight
+            if neighbour not in dist or nd < dist[neighbour]:
+                dist[neighbour] = nd
+                parent[neighbour] = (node, link)
+                heapq.heappush(heap, (nd, order, neighbour))
+                order += 1
+    return dist, parent
+
+
+class AnalyticController(object):
+    def __init__(self, name, **params):
+        self.name = name
+        self.params = params
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class AnalyticNode(object):
+    def __init__(self, name, ip=None, **params):
+        self.name = name
+        self.ip = ip
+        self.params = params
+        self.waiting = False
+        self.shell = True
+
+    def IP(self):
+        return self.ip
+
+    def start(self, controllers):
+        pass
+
+    def __repr__(self):
+        return "<%s>" % self.name
+
+
+class AnalyticLink(object):
+    def __init__(self, node1, node2, bw=None, delay=None, loss=None, max_queue_size=None, **params):
+        self.node1 = node1
+        self.node2 = node2
+        self.bw = bw  # Mbit/s, None for unlimited
+        self.delay = _milliseconds(delay)
+        self.loss = float(loss or 0) / 100.0
+        self.max_queue_size = max_queue_size
+        self.up = True
+
+    # serviceTime()
+    #
+    # Purpose: Time in ms to put one packet on the link.
+    #
+    def serviceTime(self):
+        if not self.bw:
+            return 0.0
+        return PACKET_SIZE * 8.0 / (float(self.bw) * 1000.0)
+
+    # queueingDelay( flows )
+    #
+    # Purpose: Mean queueing delay in ms with a number of greedy flows sharing the link. Each flow keeps about one
+    # packet queued, capped by the queue length.
+    #
+    def queueingDelay(self, flows):
+        queued = flows
+        if self.max_queue_size is not None:
+            queued = min(queued, self.max_queue_size)
+        return queued * self.serviceTime()
+
+
+class AnalyticTraffic(object):
+    def __init__(self, flow_count):
+        self.offered = flow_count
+        self.achieved = flow_count
+        self.dispatch_lags = [0.0] * flow_count
+
+    def stop(self):
+        pass
+
+
+class AnalyticNet(object):
+    def __init__(self, seed=None, **params):
+        self.random = random.Random(seed)
+        self.params = params
+        self.clock = 0.0
+        self.controllers = []
+        self.switches = []
+        self.hosts = []
+        self.links = []
+        self.nameToNode = {}
+        self.flows = []  # (start, end, src, dst)
+
+    def now(self):
+        return self.clock
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.clock += seconds
+
+    def addController(self, name='c0', controller=None, **params):
+        c = AnalyticController(name, **params)
+        self.controllers.append(c)
+        return c
+
+    def addSwitch(self, name, **params):
+        sw = AnalyticNode(name, **params)
+        self.switches.append(sw)
+        self.nameToNode[name] = sw
+        return sw
+
+    def addHost(self, name, **params):
+        number = len(self.hosts) + 1
+        host = AnalyticNode(name, ip="10.%d.%d.%d" % (number >> 16, (number >> 8) & 0xFF, number & 0xFF), **params)
+        self.hosts.append(host)
+        self.nameToNode[name] = host
+        return host
+
+    def addLink(self, node1, node2, **params):
+        link = AnalyticLink(node1, node2, **params)
+        self.links.append(link)
+        return link
+
+    def build(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def configLinkStatus(self, src, dst, status):
+        for link in self.links:
+            if {link.node1.name, link.node2.name} == {src, dst}:
+                link.up = (status == 'up')
+
+    # startTraffic( schedule, port, drain_timeout )
+    #
+    # Purpose: Add the flows of a traffic.trafficSchedule(), starting now. port and drain_timeout are only used by
+    # the Mininet backend.
+    #
+    def startTraffic(self, schedule, port=None, drain_timeout=None):
+        for flow in schedule:
+            start = self.clock + flow.start
+            self.flows.append((start, start + flow.duration, self.hosts[flow.src], self.hosts[flow.dst]))
+        return AnalyticTraffic(len(schedule))
+
+    def _adjacency(self):
+        adjacency = {}
+        for link in self.links:
+            if link.up:
+                adjacency.setdefault(link.node1, []).append((link.node2, link.delay, link))
+                adjacency.setdefault(link.node2, []).append((link.node1, link.delay, link))
+        return adjacency
+
+    def _path(self, parent, node):
+        links = []
+        while parent.get(node) is not None:
+            node, link = parent[node]
+            links.append(link)
+        return links
+
+    def _linkFlows(self, adjacency):
+        flows = {}
+        trees = {}
+        for start, end, src, dst in self.flows:
+            if start <= self.clock < end:
+                if src not in trees:
+                    trees[src] = shortestPaths(adjacency, src)
+                dist, parent = trees[src]
+                if dst in dist:
+                    for link in self._path(parent, dst):
+                        flows[link] = flows.get(link, 0) + 1
+        return flows
+
+    # probeHosts( source, targets, timeout, count )
+    #
+    # Purpose: Model pinging every target from source with count packets. Returns one
+    # (sent, received, rttmin, rttavg, rttmax, rttdev) tuple per target, as Mininet.pingFull does.
+    #
+    def probeHosts(self, source, targets, timeout='1', count=1):
+        adjacency = self._adjacency()
+        linkFlows = self._linkFlows(adjacency)
+        dist, parent = shortestPaths(adjacency, source)
+        timeout_ms = float(timeout) * 1000.0
+        results = []
+        for target in targets:
+            if target not in dist:
+                results.append((count, 0, 0.0, 0.0, 0.0, 0.0))
+                continue
+            path = self._path(parent, target)
+            rtts = []
+            for _ in range(count):
+                rtt = 2.0 * dist[target] + HOST_DELAY
+                lost = False
+                for link in path:
+                    if self.random.random() < link.loss or self.random.random() < link.loss:
+                        lost = True
+                        break
+                    mean = link.queueingDelay(linkFlows.get(link, 0))
+                    if mean > 0:
+                        rtt += self.random.expovariate(1.0 / mean) + self.random.expovariate(1.0 / mean)
+                if not lost and rtt <= timeout_ms:
+                    rtts.append(rtt)
+            if not rtts:
+                results.append((count, 0, 0.0, 0.0, 0.0, 0.0))
+                continue
+            avg = sum(rtts) / len(rtts)
+            mdev = math.sqrt(sum((r - avg) ** 2 for r in rtts) / len(rtts))
+            results.append((count, len(rtts), min(rtts), avg, max(rtts), mdev))
+        return results
+
+    # ping( hosts, timeout )
+    #
+    # Purpose: Packet loss percentage of one ping from hosts[0] to hosts[1], as Mininet.ping returns.
+    #
+    def ping(self, hosts, timeout=None):
+        sent, received = self.probeHosts(hosts[0], [hosts[1]], timeout or '1')[0][:2]
+        return 100.0 * (sent - received) / sent
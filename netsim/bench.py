@@ -0,0 +1,245 @@
+"""
+Benchmarks for the parts of the simulator that do not need a kernel network: topology generation, building the
+network, the adjacency matrix, laying out and writing records, and decoding them with dataDecoder.py.
+
+FakeNet stands in for Mininet: it implements the calls the simulator makes to build a network and records them,
+without creating any switch, host or link.
+
+Usage:
+    python -m netsim bench [--sizes 25,75,250,1000,2000] [--label NAME] [--compare RESULTS.json] [--threshold 1.25]
+
+Results are saved to bench_results/<label>.json (the label defaults to the current git commit). With --compare,
+every benchmark that got slower than the threshold times its time in the other results file is reported as a
+regression, and the exit status is 1.
+
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from . import dataDecoder
+from . import dataFormat
+from . import topology
+
+RESULTS_DIRECTORY = "bench_results"
+SIZES = [25, 75, 250, 1000, 2000]
+RECORD_CELLS = 2000000  # rough number of matrix cells per size, to keep large sizes short
+REPEAT = 3
+WINDOW_COUNT = 5
+LINK_CUT_WINDOW = 2
+
+
+class FakeNode(object):
+    def __init__(self, name, **params):
+        self.name = name
+        self.params = params
+
+    def IP(self):
+        return self.params.get("ip")
+
+    def start(self, controllers):
+        pass
+
+
+###
+### Stand-in for a Mininet network. Every call is appended to calls as (method name, args, keyword args).
+###
+class FakeNet(object):
+    def __init__(self, *args, **params):
+        self.calls = []
+        self.controllers = []
+        self.switches = []
+        self.hosts = []
+        self.links = []
+
+    def addController(self, name='c0', **params):
+        self.calls.append(("addController", (name,), params))
+        controller = FakeNode(name, **params)
+        self.controllers.append(controller)
+        return controller
+
+    def addSwitch(self, name, **params):
+        self.calls.append(("addSwitch", (name,), params))
+        switch = FakeNode(name, **params)
+        self.switches.append(switch)
+        return switch
+
+    def addHost(self, name, **params):
+        self.calls.append(("addHost", (name,), params))
+        host = FakeNode(name, ip="10.0.%d.%d" % (len(self.hosts) // 250, len(self.hosts) % 250 + 1), **params)
+        self.hosts.append(host)
+        return host
+
+    def addLink(self, node1, node2, **params):
+        self.calls.append(("addLink", (node1.name, node2.name), params))
+        self.links.append((node1, node2, params))
+        return self.links[-1]
+
+    def build(self):
+        self.calls.append(("build", (), {}))
+
+    def configLinkStatus(self, src, dst, status):
+        self.calls.append(("configLinkStatus", (src, dst, status), {}))
+
+    def stop(self):
+        self.calls.append(("stop", (), {}))
+
+
+def _best(function, repeat=REPEAT):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        function()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def _topologies(size, count):
+    return [topology.generateTopology(seed, min_node=max(1, size - topology.MAX_LOOP_SIZE), max_node=size)
+            for seed in range(count)]
+
+
+def _buildNetwork(topo):
+    net = FakeNet()
+    net.addController(ip="127.0.0.1", port=6633)
+    switches = topology.instantiate(topo, net, lambda i: "s" + str(i), protocols="OpenFlow13")
+    for i, switch in enumerate(switches):
+        net.addLink(net.addHost("h" + str(i)), switch)
+    net.build()
+    return net
+
+
+def _row(topo, rng):
+    n = topo.node_count
+    adj_matrix = topo.adjacencyMatrix()
+    failure_adj_matrix = [row[:] for row in adj_matrix]
+    loop_edges = topo.loopEdges()
+    if loop_edges:
+        k = loop_edges[rng.randrange(len(loop_edges))]
+        failure_adj_matrix[topo.src[k]][topo.dst[k]] = 0
+        failure_adj_matrix[topo.dst[k]][topo.src[k]] = 0
+    central_node_index = rng.randrange(n)
+    latency_list = [0.0 if j % n == central_node_index else round(rng.uniform(1.0, 60.0), 3)
+                    for j in range(WINDOW_COUNT * n)]
+    return dataFormat.csvRow(n, central_node_index, [0] * n, latency_list, adj_matrix, failure_adj_matrix)
+
+
+# benchmarkSize( size, directory )
+#
+# Purpose: Time every benchmark for networks of about size switches. Returns {benchmark: seconds per record}.
+#
+def benchmarkSize(size, directory):
+    count = max(1, min(20, RECORD_CELLS // (size * size)))
+    rng = random.Random(size)
+    results = {}
+
+    results["topology"] = _best(lambda: _topologies(size, count)) / count
+    topologies = _topologies(size, count)
+    results["build"] = _best(lambda: [_buildNetwork(topo) for topo in topologies]) / count
+    results["adjacency"] = _best(lambda: [topo.adjacencyMatrix() for topo in topologies]) / count
+    results["csv_row"] = _best(lambda: [_row(topo, rng) for topo in topologies]) / count
+    rows = [_row(topo, rng) for topo in topologies]
+    header = [len(rows), 30, 4, WINDOW_COUNT, LINK_CUT_WINDOW, 5]
+
+    csv_name = os.path.join(directory, "bench%d.csv" % size)
+    shard_name = os.path.join(directory, "bench%d%s" % (size, dataFormat.EXTENSION))
+
+    def writeCsv():
+        with open(csv_name, 'w') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    def writeShard():
+        with dataFormat.ShardWriter(shard_name, dict(zip(dataFormat.FILE_PARAMETERS, header))) as writer:
+            for row in rows:
+                writer.writeRow(row)
+
+    results["csv_write"] = _best(writeCsv) / count
+    results["shard_write"] = _best(writeShard) / count
+    results["csv_decode"] = _best(lambda: list(dataDecoder.decodeFile(csv_name))) / count
+    results["shard_decode"] = _best(lambda: list(dataDecoder.decodeFile(shard_name))) / count
+    results["csv_bytes"] = os.path.getsize(csv_name) / float(count)
+    results["shard_bytes"] = os.path.getsize(shard_name) / float(count)
+    return results
+
+
+def gitLabel():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.STDOUT).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return time.strftime("%Y%m%d-%H%M%S")
+
+
+# compareResults( results, baseline, threshold )
+#
+# Purpose: Return (benchmark, size, ratio) for every timing that is more than threshold times its baseline.
+#
+def compareResults(results, baseline, threshold):
+    regressions = []
+    for size, benchmarks in results["results"].items():
+        for name, value in benchmarks.items():
+            if name.endswith("_bytes"):
+                continue
+            old = baseline["results"].get(size, {}).get(name)
+            if old and value / old > threshold:
+                regressions.append((name, size, value / old))
+    return regressions
+
+
+# main( argv )
+#
+# Purpose: Run the benchmarks, the netsim bench command.
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark topology generation, record writing and decoding")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in SIZES))
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--compare", default=None, help="results file to check for regressions against")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    results = {"label": args.label or gitLabel(),
+               "python": platform.python_version(),
+               "platform": platform.platform(),
+               "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+               "results": {}}
+    directory = tempfile.mkdtemp()
+    try:
+        for size in [int(size) for size in args.sizes.split(",")]:
+            results["results"][str(size)] = benchmarkSize(size, directory)
+            print(str(size) + " " + " ".join("%s=%.3gs" % (name, value)
+                                             for name, value in sorted(results["results"][str(size)].items())
+                                             if not name.endswith("_bytes")))
+    finally:
+        shutil.rmtree(directory)
+
+    if not os.path.isdir(RESULTS_DIRECTORY):
+        os.makedirs(RESULTS_DIRECTORY)
+    file_name = os.path.join(RESULTS_DIRECTORY, results["label"] + ".json")
+    with open(file_name, 'w') as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+    print("wrote to " + file_name)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            regressions = compareResults(results, json.load(f), args.threshold)
+        for name, size, ratio in regressions:
+            print("REGRESSION %s at %s nodes: %.2fx slower" % (name, size, ratio))
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
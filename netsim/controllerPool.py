@@ -0,0 +1,245 @@
+"""
+Controller assignment for simulator.py.
+
+A ControllerPool hands each new network to the least loaded healthy controller instead of pinning every worker to
+one of CONTROLLER_IPS. For each controller it keeps, in shared memory visible to every worker process:
+    - the switches of the networks currently using it,
+    - an exponentially weighted moving average of the seconds per switch its networks took to become reachable
+      (the warm up time_to_ready),
+    - whether its last health check (a TCP connect to its OpenFlow port) succeeded, and when that check ran.
+acquire() picks the healthy controller with the lowest predicted convergence time, seconds per switch times the
+switches it would be serving, so a slow or overloaded controller gets fewer networks and adding controllers spreads
+the load. If no controller passes its health check, every controller is used as if healthy.
+
+StandInController is a small local controller for testing: it accepts OpenFlow connections, sends HELLO and
+FEATURES_REQUEST and answers ECHO_REQUEST, optionally after a delay to mimic an overloaded controller. It installs
+no flows. Run some with:
+    python -m netsim controllers 6633 6634 [--delay 0.5]
+and set CONTROLLER_IPS = ["127.0.0.1:6633", "127.0.0.1:6634"].
+
+"""
+
+import argparse
+import logging
+import multiprocessing
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+DEFAULT_PORT = 6633
+EWMA_WEIGHT = 0.3  # weight of the newest convergence time
+INITIAL_SECONDS_PER_SWITCH = 0.1
+HEALTH_CHECK_INTERVAL = 30  # s between health checks of a controller
+HEALTH_CHECK_TIMEOUT = 1  # s
+
+# Fields of each controller's entry in the shared state
+ACTIVE_SWITCHES, SECONDS_PER_SWITCH, HEALTHY, CHECKED_AT, NETWORKS = range(5)
+_FIELD_COUNT = 5
+
+OFP_VERSION = 4  # OpenFlow 1.3
+OFPT_HELLO, OFPT_ECHO_REQUEST, OFPT_ECHO_REPLY, OFPT_FEATURES_REQUEST = 0, 2, 3, 5
+_OFP_HEADER = struct.Struct("!BBHI")
+
+log = logging.getLogger(__name__)
+
+
+# parseAddress( address )
+#
+# Purpose: Split "ip" or "ip:port" into (ip, port).
+#
+def parseAddress(address):
+    if ":" in address:
+        ip, port = address.rsplit(":", 1)
+        return ip, int(port)
+    return address, DEFAULT_PORT
+
+
+###
+### Controller load and health shared by the worker processes. Create it before starting them.
+###
+class ControllerPool(object):
+    def __init__(self, addresses, check_health=True):
+        self.addresses = [parseAddress(address) for address in addresses]
+        self.check_health = check_health
+        self.state = multiprocessing.Array("d", _FIELD_COUNT * len(self.addresses))
+        for i in range(len(self.addresses)):
+            self.state[i * _FIELD_COUNT + SECONDS_PER_SWITCH] = INITIAL_SECONDS_PER_SWITCH
+            self.state[i * _FIELD_COUNT + HEALTHY] = 1.0
+            self.state[i * _FIELD_COUNT + CHECKED_AT] = -HEALTH_CHECK_INTERVAL
+
+    def get(self, i, field):
+        return self.state[i * _FIELD_COUNT + field]
+
+    def _add(self, i, field, value):
+        self.state[i * _FIELD_COUNT + field] += value
+
+    # healthCheck( i )
+    #
+    # Purpose: Try a TCP connection to controller i and record whether it succeeded. Returns the result.
+    #
+    def healthCheck(self, i):
+        try:
+            socket.create_connection(self.addresses[i], HEALTH_CHECK_TIMEOUT).close()
+            healthy = True
+        except (OSError, socket.timeout):
+            healthy = False
+        with self.state.get_lock():
+            if healthy != bool(self.get(i, HEALTHY)):
+                log.log(logging.INFO if healthy else logging.WARNING, "controller %s:%d is %s", self.addresses[i][0],
+                        self.addresses[i][1], "back up" if healthy else "not answering")
+            self.state[i * _FIELD_COUNT + HEALTHY] = 1.0 if healthy else 0.0
+        return healthy
+
+    # _claimChecks()
+    #
+    # Purpose: Mark the controllers whose health check is due as checked now and return them, so that only one
+    # worker checks each.
+    #
+    def _claimChecks(self):
+        now = time.time()
+        due = []
+        with self.state.get_lock():
+            for i in range(len(self.addresses)):
+                if now - self.get(i, CHECKED_AT) >= HEALTH_CHECK_INTERVAL:
+                    self.state[i * _FIELD_COUNT + CHECKED_AT] = now
+                    due.append(i)
+        return due
+
+    # predictedSeconds( i, switch_count )
+    #
+    # Purpose: Predicted convergence time of a network of switch_count switches on controller i.
+    #
+    def predictedSeconds(self, i, switch_count):
+        return self.get(i, SECONDS_PER_SWITCH) * (self.get(i, ACTIVE_SWITCHES) + switch_count)
+
+    # acquire( switch_count )
+    #
+    # Purpose: Assign a network of switch_count switches to the least loaded healthy controller. Returns the
+    # controller's number; pass it to observe() and release().
+    #
+    def acquire(self, switch_count):
+        if self.check_health:
+            for i in self._claimChecks():
+                self.healthCheck(i)
+        with self.state.get_lock():
+            candidates = [i for i in range(len(self.addresses)) if self.get(i, HEALTHY)]
+            if not candidates:
+                log.warning("no controller passed its health check, using all of them")
+                candidates = range(len(self.addresses))
+            chosen = min(candidates, key=lambda i: (self.predictedSeconds(i, switch_count),
+                                                    self.get(i, ACTIVE_SWITCHES)))
+            self._add(chosen, ACTIVE_SWITCHES, switch_count)
+            self._add(chosen, NETWORKS, 1)
+        return chosen
+
+    # observe( i, switch_count, seconds )
+    #
+    # Purpose: Fold the convergence time of a network of switch_count switches on controller i into its average.
+    #
+    def observe(self, i, switch_count, seconds):
+        with self.state.get_lock():
+            average = self.get(i, SECONDS_PER_SWITCH)
+            self.state[i * _FIELD_COUNT + SECONDS_PER_SWITCH] = \
+                average + EWMA_WEIGHT * (seconds / max(switch_count, 1) - average)
+
+    def release(self, i, switch_count):
+        with self.state.get_lock():
+            self._add(i, ACTIVE_SWITCHES, -switch_count)
+
+    # summary()
+    #
+    # Purpose: One line per controller with its networks, load, average and health, for the log.
+    #
+    def summary(self):
+        return ["%s:%d networks=%d active_switches=%d seconds_per_switch=%.3f healthy=%s" %
+                (ip, port, self.get(i, NETWORKS), self.get(i, ACTIVE_SWITCHES), self.get(i, SECONDS_PER_SWITCH),
+                 bool(self.get(i, HEALTHY)))
+                for i, (ip, port) in enumerate(self.addresses)]
+
+
+class _StandInHandler(socketserver.BaseRequestHandler):
+    def send(self, message_type, xid, payload=b""):
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        self.request.sendall(_OFP_HEADER.pack(OFP_VERSION, message_type, _OFP_HEADER.size + len(payload), xid) +
+                             payload)
+
+    def receive(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        # A health check connects and closes at once, so a reset connection is a disconnect like any other
+        try:
+            self.send(OFPT_HELLO, 0)
+            self.send(OFPT_FEATURES_REQUEST, 1)
+            while True:
+                header = self.receive(_OFP_HEADER.size)
+                if header is None:
+                    return
+                version, message_type, length, xid = _OFP_HEADER.unpack(header)
+                payload = self.receive(length - _OFP_HEADER.size) if length > _OFP_HEADER.size else b""
+                if payload is None:
+                    return
+                if message_type == OFPT_ECHO_REQUEST:
+                    self.send(OFPT_ECHO_REPLY, xid, payload)
+        except OSError:
+            return
+
+
+###
+### Local OpenFlow endpoint for testing the pool; not a working controller.
+###
+class StandInController(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0, delay=0.0):
+        socketserver.ThreadingTCPServer.__init__(self, ("127.0.0.1", port), _StandInHandler)
+        self.delay = delay
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.port = self.server_address[1]
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+# main( argv )
+#
+# Purpose: Run stand-in controllers until interrupted, the netsim controllers command.
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run stand-in OpenFlow controllers on 127.0.0.1")
+    parser.add_argument("ports", nargs="+", type=int)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before each message")
+    args = parser.parse_args(argv)
+
+    controllers = [StandInController(port, args.delay).start() for port in args.ports]
+    print("stand-in controllers on 127.0.0.1:" + ", ".join(str(c.port) for c in controllers))
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        for controller in controllers:
+            controller.stop()
+
+
+if __name__ == "__main__":
+    main()
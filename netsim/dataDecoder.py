@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+Author: Jonathan Balewicz
+Date: January 10, 2021
+
+Purpose: Decode data produced by simulator.py
+
+decodeFile() yields one Record per simulation of a dataWLatency*.csv file or a dataFormat.py shard, reading a single
+row (or shard chunk) at a time, so files of any length decode in constant memory. decodeShards() spreads the chunks
+and row ranges of many files over a process pool and yields their records in order. For random access and filtering
+without decoding whole files, see shardIndex.py.
+
+Usage:
+    python -m netsim decode [--processes N] [--output merged.nsd] [files ...]
+With no files, every dataWLatency{d}t{thread} .csv or .nsd file in --directory is decoded.
+    
+"""
+
+import argparse
+import collections
+import csv
+import io
+import itertools
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+from . import dataFormat
+from . import shardJournal
+
+SHARD_PATTERN = re.compile(r"^dataWLatency(\d+)t(\d+)\.(csv|nsd)$")
+PIECE_RECORDS = 64  # CSV rows decoded per task of the process pool
+
+#
+# File wide variables:
+# SIMULATION_COUNT,
+# TIME_BETWEEN_PINGS, # in seconds
+# PINGS_PER_WINDOW,
+# WINDOW_COUNT, # total number of windows per network/simulation
+# LINK_CUT_WINDOW, # window where the link was cut before the latency data was taken
+#
+# Network specific variables:
+# node_count,
+# central_node_index,
+# alarm_list, # 1 for alarm, 0 for no alarm for each node
+# latency_matrix_before_link_cut,
+# latency_matrix_after_link_cut,
+# adj_matrix, # failure free matrix
+# failure_adj_matrix, # matrix with the failure
+# removed_link # (i, j) link of adj_matrix missing from failure_adj_matrix, None if no link was cut
+#
+# latency_matrix_before_link_cut[i][j] is the average latency from the central node to node j, (LINK_CUT_WINDOW - i)
+# windows before the link was cut. The max i is (LINK_CUT_WINDOW - 1) representing the last window before the
+# link was cut. Latencies are averaged over the pings of a window that were answered; latency is 0 if every ping
+# was dropped, or the index j is the central node.
+#
+# latency_matrix_after_link_cut[i][j] is the average latency from the central node to node j, i windows
+# after the link was cut. The max i is (WINDOW_COUNT - 1) representing the last window
+# taken. When i = 0, it represents the first window after the link was cut.
+#
+Record = collections.namedtuple("Record", ["node_count",
+										   "central_node_index",
+										   "alarm_list",
+										   "latency_matrix_before_link_cut",
+										   "latency_matrix_after_link_cut",
+										   "adj_matrix",
+										   "failure_adj_matrix",
+										   "removed_link"])
+
+
+# reshape( flat, rows, columns )
+#
+# Purpose: Cut a flat sequence into a list of rows.
+#
+def reshape(flat, rows, columns):
+	return [list(flat[i * columns:(i + 1) * columns]) for i in range(rows)]
+
+
+# readHeader( file_name )
+#
+# Purpose: Return the file wide variables of a CSV file or shard as a dict.
+#
+def readHeader(file_name):
+	if file_name.endswith(dataFormat.EXTENSION):
+		return dataFormat.ShardReader(file_name).parameters
+	with open(file_name, 'r') as f:
+		return dict(zip(dataFormat.FILE_PARAMETERS, dataFormat.toInts(next(csv.reader(f)))))
+
+
+def _record(node_count, central_node_index, alarm_list, latencies, adj_matrix, failure_adj_matrix, removed_link,
+			link_cut_window, window_count):
+	split = link_cut_window * node_count
+	return Record(node_count,
+				  central_node_index,
+				  alarm_list,
+				  reshape(latencies[:split], link_cut_window, node_count),
+				  reshape(latencies[split:], window_count - link_cut_window, node_count),
+				  adj_matrix,
+				  failure_adj_matrix,
+				  removed_link)
+
+
+# decodeCsv( file_name )
+#
+# Purpose: Yield the Records of a dataWLatency*.csv file.
+#
+def decodeCsv(file_name):
+	with open(file_name, 'r') as f:
+		reader = csv.reader(f)
+		header = dict(zip(dataFormat.FILE_PARAMETERS, dataFormat.toInts(next(reader))))
+		window_count = header["WINDOW_COUNT"]
+		link_cut_window = header["LINK_CUT_WINDOW"]
+		for row in reader:
+			if row:
+				yield csvRecord(row, window_count, link_cut_window)
+
+
+# csvRecord( row, window_count, link_cut_window )
+#
+# Purpose: Return the Record of one record row of a CSV file.
+#
+def csvRecord(row, window_count, link_cut_window):
+	node_count, central_node_index, alarms, latencies, adj_flat, failure_flat = \
+		dataFormat.splitCsvRow(row, window_count)
+	adj_flat = dataFormat.toInts(adj_flat)
+	failure_flat = dataFormat.toInts(failure_flat)
+	return _record(node_count,
+				   central_node_index,
+				   dataFormat.toInts(alarms),
+				   list(map(float, latencies)),
+				   reshape(adj_flat, node_count, node_count),
+				   reshape(failure_flat, node_count, node_count),
+				   dataFormat.removedLink(adj_flat, failure_flat, node_count),
+				   link_cut_window,
+				   window_count)
+
+
+# decodeShard( file_name )
+#
+# Purpose: Yield the Records of a dataFormat.py shard.
+#
+def decodeShard(file_name):
+	reader = dataFormat.ShardReader(file_name)
+	window_count = reader.parameters["WINDOW_COUNT"]
+	link_cut_window = reader.parameters["LINK_CUT_WINDOW"]
+	for shard_record in reader:
+		yield shardRecord(shard_record, window_count, link_cut_window)
+
+
+# shardRecord( shard_record, window_count, link_cut_window )
+#
+# Purpose: Return the Record of one record yielded by a dataFormat.ShardReader.
+#
+def shardRecord(shard_record, window_count, link_cut_window):
+	node_count, central_node_index, alarm_list, latencies, edges, removed_link = shard_record
+	adj_matrix = [[0] * node_count for _ in range(node_count)]
+	for i, j in edges:
+		adj_matrix[i][j] = 1
+		adj_matrix[j][i] = 1
+	failure_adj_matrix = [row[:] for row in adj_matrix]
+	if removed_link is not None:
+		i, j = removed_link
+		failure_adj_matrix[i][j] = 0
+		failure_adj_matrix[j][i] = 0
+	return _record(node_count,
+				   central_node_index,
+				   alarm_list,
+				   latencies.tolist(),
+				   adj_matrix,
+				   failure_adj_matrix,
+				   removed_link,
+				   link_cut_window,
+				   window_count)
+
+
+# decodeFile( file_name )
+#
+# Purpose: Yield the Records of a CSV file or shard, chosen by the file extension.
+#
+def decodeFile(file_name):
+	if file_name.endswith(dataFormat.EXTENSION):
+		return decodeShard(file_name)
+	return decodeCsv(file_name)
+
+
+# recordRow( record )
+#
+# Purpose: Lay out a Record as a CSV record row.
+#
+def recordRow(record):
+	latency_list = []
+	for window in record.latency_matrix_before_link_cut + record.latency_matrix_after_link_cut:
+		latency_list.extend(window)
+	return dataFormat.csvRow(record.node_count, record.central_node_index, record.alarm_list, latency_list,
+							 record.adj_matrix, record.failure_adj_matrix)
+
+
+# findShards( directory )
+#
+# Purpose: Return the dataWLatency{d}t{thread} files in directory, ordered by thread then file number. A shard
+# kept as both .csv and .nsd, as after convert, is returned once as its .nsd file.
+#
+def findShards(directory="."):
+	shards = {}
+	for name in os.listdir(directory):
+		match = SHARD_PATTERN.match(name)
+		if match:
+			key = (int(match.group(2)), int(match.group(1)))
+			if key not in shards or match.group(3) == "nsd":
+				shards[key] = os.path.join(directory, name)
+	return [shards[key] for key in sorted(shards)]
+
+
+# _pieces( file_name )
+#
+# Purpose: Yield the (file_name, offset, length) byte ranges the process pool decodes a file in: one chunk of a
+# shard, or PIECE_RECORDS rows of a CSV file. Only chunk headers and line ends are read to find them.
+#
+def _pieces(file_name):
+	if file_name.endswith(dataFormat.EXTENSION):
+		for offset, length in dataFormat.ShardReader(file_name).chunkSpans():
+			yield file_name, offset, length
+		return
+	with open(file_name, 'rb') as f:
+		f.readline()
+		start = end = f.tell()
+		rows = 0
+		for line in f:
+			end += len(line)
+			rows += 1
+			if rows == PIECE_RECORDS:
+				yield file_name, start, end - start
+				start, rows = end, 0
+		if rows:
+			yield file_name, start, end - start
+
+
+def _decodePiece(piece):
+	file_name, offset, length = piece
+	start = time.time()
+	header = readHeader(file_name)
+	window_count = int(header["WINDOW_COUNT"])
+	link_cut_window = int(header["LINK_CUT_WINDOW"])
+	with open(file_name, 'rb') as f:
+		f.seek(offset)
+		data = f.read(length)
+	if file_name.endswith(dataFormat.EXTENSION):
+		reader = dataFormat.ShardReader(file_name)
+		count, payload = reader.readChunk(io.BytesIO(data))
+		records = [shardRecord(shard_record, window_count, link_cut_window)
+				   for shard_record in reader.decodeChunk(count, payload)]
+	else:
+		records = [csvRecord(row, window_count, link_cut_window)
+				   for row in csv.reader(data.decode("utf-8").splitlines()) if row]
+	return file_name, records, time.time() - start
+
+
+# decodeShards( file_names, processes )
+#
+# Purpose: Yield the Records of file_names in order, decoding on a pool of processes if processes > 1. The pool
+# works on pieces of at most one chunk or PIECE_RECORDS rows, at most two per process ahead of the consumer, so
+# memory stays bounded by the piece size however large a file is. Per shard throughput is reported on stderr.
+#
+def decodeShards(file_names, processes=1):
+	if processes <= 1:
+		return _decodeShardsSerial(file_names)
+	return _decodeShardsParallel(file_names, processes)
+
+
+def _decodeShardsSerial(file_names):
+	for file_name in file_names:
+		start = time.time()
+		count = 0
+		for record in decodeFile(file_name):
+			count += 1
+			yield record
+		_reportShard(file_name, count, time.time() - start)
+
+
+def _decodeShardsParallel(file_names, processes):
+	pool = multiprocessing.Pool(processes)
+	try:
+		pending = collections.deque()
+		pieces = itertools.chain.from_iterable(_pieces(file_name) for file_name in file_names)
+
+		def results():
+			for piece in pieces:
+				pending.append(pool.apply_async(_decodePiece, (piece,)))
+				if len(pending) >= 2 * processes:
+					yield pending.popleft().get()
+			while pending:
+				yield pending.popleft().get()
+
+		current, count, elapsed = None, 0, 0.0
+		for file_name, records, seconds in results():
+			if file_name != current:
+				if current is not None:
+					_reportShard(current, count, elapsed)
+				current, count, elapsed = file_name, 0, 0.0
+			count += len(records)
+			elapsed += seconds
+			for record in records:
+				yield record
+		if current is not None:
+			_reportShard(current, count, elapsed)
+	finally:
+		pool.terminate()
+		pool.join()
+
+
+def _reportShard(file_name, count, elapsed):
+	size = os.path.getsize(file_name)
+	sys.stderr.write("decoded %s: %d records, %.1f records/s, %.2f MB/s\n"
+					 % (file_name, count, count / max(elapsed, 1e-9), size / 1e6 / max(elapsed, 1e-9)))
+
+
+# mergeShards( file_names, output, processes )
+#
+# Purpose: Decode shards in parallel and write all of their records, in order, to one .csv or .nsd file. The
+# shards must share their file wide variables. Returns the number of records written.
+#
+def mergeShards(file_names, output, processes=1):
+	parameters = None
+	for file_name in file_names:
+		header = readHeader(file_name)
+		header.pop("SIMULATION_COUNT")
+		if parameters is None:
+			parameters = header
+		elif any(header.get(k) != parameters.get(k) for k in dataFormat.FILE_PARAMETERS[1:]):
+			raise ValueError(file_name + " does not share the file wide variables of " + file_names[0])
+	if parameters is None:
+		raise ValueError("no shards to merge")
+
+	records = decodeShards(file_names, processes)
+	count = 0
+	if output.endswith(dataFormat.EXTENSION):
+		with dataFormat.ShardWriter(output, parameters) as writer:
+			for record in records:
+				writer.writeRow(recordRow(record))
+				count += 1
+		return count
+
+	# The count is not known until the last record, so it is written zero padded and rewritten in place
+	with open(output, 'w') as f:
+		writer = csv.writer(f)
+		writer.writerow(["0" * shardJournal.COUNT_WIDTH] + [parameters[k] for k in dataFormat.FILE_PARAMETERS[1:]])
+		for record in records:
+			writer.writerow(recordRow(record))
+			count += 1
+		f.seek(0)
+		f.write("%0*d" % (shardJournal.COUNT_WIDTH, count))
+	return count
+
+
+# main( argv )
+#
+# Purpose: Decode or merge files, the netsim decode command.
+#
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Decode data produced by the simulator")
+	parser.add_argument("files", nargs="*",
+						help="files to decode, by default every dataWLatency file in --directory")
+	parser.add_argument("--directory", default=".")
+	parser.add_argument("--processes", type=int, default=1)
+	parser.add_argument("--output", help="merge the records into this .csv or .nsd file instead of printing them")
+	args = parser.parse_args(argv)
+
+	file_names = args.files or findShards(args.directory)
+	if args.output:
+		print("wrote " + str(mergeShards(file_names, args.output, args.processes)) + " records to " + args.output)
+	else:
+		for record in decodeShards(file_names, args.processes):
+			print(record.alarm_list)
+			print(record.latency_matrix_before_link_cut)
+			print(record.latency_matrix_after_link_cut)
+			print(record.adj_matrix)
+			print(record.failure_adj_matrix)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,458 @@
+"""
+Compact binary shard format for the data produced by simulator.py.
+
+A shard (.nsd file) holds the same records as a dataWLatency*.csv file:
+
+    magic           8 bytes, b"NSIMSHD1"
+    record count    uint32, the file's SIMULATION_COUNT (OPEN_COUNT while a writer still has the file open)
+    header length   uint32
+    header          JSON object with the file wide variables (TIME_BETWEEN_PINGS, PINGS_PER_WINDOW, WINDOW_COUNT,
+                    LINK_CUT_WINDOW, MAX_TRAFFIC_DURATION, ...)
+    chunks          until the end of the file, each one:
+        record count    uint32
+        payload length  uint32
+        crc32           uint32 of the payload
+        payload         zlib compressed columns of the chunk's records, one after the other:
+                            node_count          uint16 per record
+                            central_node_index  uint16 per record
+                            removed link        2 x int32 per record, (-1, -1) if no link was cut
+                            alarm_list          bit packed, padded to a whole byte per record
+                            latencies           float32, WINDOW_COUNT * node_count per record
+                            adj_matrix          upper triangle, bit packed, padded to a whole byte per record
+
+The failure adjacency matrix is not stored, it is adj_matrix with the removed link taken out.
+All integers are little endian.
+
+Convert existing CSV files with:
+    python -m netsim convert dataWLatency1t0.csv [more.csv ...]
+
+"""
+
+import argparse
+import array
+import csv
+import json
+import os
+import struct
+import sys
+import zlib
+
+MAGIC = b"NSIMSHD1"
+EXTENSION = ".nsd"
+OPEN_COUNT = 0xFFFFFFFF
+CHUNK_RECORDS = 64
+
+# Order of the file wide variables in the first row of a CSV file
+FILE_PARAMETERS = ["SIMULATION_COUNT",
+                   "TIME_BETWEEN_PINGS",
+                   "PINGS_PER_WINDOW",
+                   "WINDOW_COUNT",
+                   "LINK_CUT_WINDOW",
+                   "MAX_TRAFFIC_DURATION"]
+
+_FILE_HEADER = struct.Struct("<8sII")
+_CHUNK_HEADER = struct.Struct("<III")
+
+
+# packBits( bits )
+#
+# Purpose: Pack a sequence of 0/1 values into bytes, most significant bit first.
+#
+def packBits(bits):
+    n = len(bits)
+    if n == 0:
+        return b""
+    text = "".join(["1" if b else "0" for b in bits]) + "0" * (-n % 8)
+    return int(text, 2).to_bytes(len(text) // 8, "big")
+
+
+# unpackBits( data, n )
+#
+# Purpose: Return the first n bits of data as a string of '0' and '1' characters.
+#
+def unpackBits(data, n):
+    if n == 0:
+        return ""
+    return bin(int.from_bytes(data, "big"))[2:].zfill(len(data) * 8)[:n]
+
+
+def toInts(values):
+    try:
+        return list(map(int, values))
+    except (TypeError, ValueError):
+        return [int(float(v)) for v in values]
+
+
+def packedSize(bit_count):
+    return (bit_count + 7) // 8
+
+
+def triangleSize(node_count):
+    return node_count * (node_count - 1) // 2
+
+
+# upperTriangle( adj_flat, node_count )
+#
+# Purpose: Return the entries above the diagonal of a flattened adjacency matrix, row by row.
+#
+def upperTriangle(adj_flat, node_count):
+    bits = []
+    for i in range(node_count):
+        bits.extend(adj_flat[i * node_count + i + 1:(i + 1) * node_count])
+    return bits
+
+
+# triangleEdges( bits, node_count )
+#
+# Purpose: Return the (i, j) links, i < j, set in an upper triangle bit string.
+#
+def triangleEdges(bits, node_count):
+    row_starts = []
+    start = 0
+    for i in range(node_count):
+        row_starts.append(start)
+        start += node_count - i - 1
+    edges = []
+    i = 0
+    k = bits.find("1")
+    while k >= 0:
+        while i + 1 < node_count and row_starts[i + 1] <= k:
+            i += 1
+        edges.append((i, i + 1 + k - row_starts[i]))
+        k = bits.find("1", k + 1)
+    return edges
+
+
+# removedLink( adj_flat, failure_adj_flat, node_count )
+#
+# Purpose: Return the (i, j) link, i < j, present in adj_flat but not in failure_adj_flat, or None if the matrices
+# are equal. Raises ValueError if they differ by anything other than one removed link.
+#
+def removedLink(adj_flat, failure_adj_flat, node_count):
+    if adj_flat == failure_adj_flat:
+        return None
+    changed = [k for k in range(node_count * node_count) if adj_flat[k] != failure_adj_flat[k]]
+    if len(changed) != 2:
+        raise ValueError("failure matrix differs from the adjacency matrix by more than one link")
+    i, j = divmod(changed[0], node_count)
+    if changed[1] != j * node_count + i or not adj_flat[changed[0]] or failure_adj_flat[changed[0]]:
+        raise ValueError("failure matrix is not the adjacency matrix with one link removed")
+    return i, j
+
+
+# splitCsvRow( row, window_count )
+#
+# Purpose: Split one record row of a CSV file into node_count, central_node_index, alarm_list, latency_list,
+# adj_matrix_flat and failure_adj_matrix_flat. Values are returned as they appear in the row.
+#
+def splitCsvRow(row, window_count):
+    node_count = int(float(row[0]))
+    alarm_start = 2
+    latency_start = alarm_start + node_count
+    adj_start = latency_start + node_count * window_count
+    failure_start = adj_start + node_count * node_count
+    return (node_count,
+            int(float(row[1])),
+            row[alarm_start:latency_start],
+            row[latency_start:adj_start],
+            row[adj_start:failure_start],
+            row[failure_start:failure_start + node_count * node_count])
+
+
+# csvRow( node_count, central_node_index, alarm_list, latency_list, adj_matrix, failure_adj_matrix )
+#
+# Purpose: Lay out one simulation as a CSV record row.
+#
+def csvRow(node_count, central_node_index, alarm_list, latency_list, adj_matrix, failure_adj_matrix):
+    line = [node_count, central_node_index]
+    line = line + list(alarm_list)
+    line = line + list(latency_list)
+    for sub in adj_matrix:
+        line.extend(sub)
+    for sub in failure_adj_matrix:
+        line.extend(sub)
+    return line
+
+
+def _littleEndian(values):
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+###
+### Write records to a shard. The record count in the file header is only filled in by close(), so a shard that
+### was not closed can be told apart from a finished one.
+### resume=(end, record_count) appends to an existing shard instead, after cutting it off at byte end, where its
+### first record_count records end.
+###
+class ShardWriter(object):
+    def __init__(self, file_name, parameters, chunk_records=CHUNK_RECORDS, resume=None):
+        self.file_name = file_name
+        self.parameters = dict((k, v) for k, v in parameters.items() if k != "SIMULATION_COUNT")
+        self.window_count = int(self.parameters["WINDOW_COUNT"])
+        self.chunk_records = chunk_records
+        self.record_count = 0
+        self.pending = []
+        if resume is None:
+            header = json.dumps(self.parameters, sort_keys=True).encode("utf-8")
+            self.f = open(file_name, "wb")
+            self.f.write(_FILE_HEADER.pack(MAGIC, OPEN_COUNT, len(header)))
+            self.f.write(header)
+        else:
+            end, self.record_count = resume
+            self.f = open(file_name, "r+b")
+            self.f.truncate(end)
+            self.f.seek(end)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # write( node_count, central_node_index, alarm_list, latency_list, adj_matrix_flat, failure_adj_matrix_flat )
+    #
+    # Purpose: Add one simulation to the shard. The matrices are flattened row by row, as in the CSV files.
+    # Returns the bytes of the chunk written if the record completed one, b"" otherwise.
+    #
+    def write(self, node_count, central_node_index, alarm_list, latency_list, adj_matrix_flat,
+              failure_adj_matrix_flat):
+        adj_flat = toInts(adj_matrix_flat)
+        failure_flat = toInts(failure_adj_matrix_flat)
+        if len(adj_flat) != node_count * node_count or len(failure_flat) != node_count * node_count:
+            raise ValueError("adjacency matrices do not match node_count " + str(node_count))
+        if len(latency_list) != node_count * self.window_count:
+            raise ValueError("latency list does not match node_count " + str(node_count))
+        link = removedLink(adj_flat, failure_flat, node_count)
+        self.pending.append((node_count,
+                             int(central_node_index),
+                             link if link is not None else (-1, -1),
+                             packBits(toInts(alarm_list)),
+                             list(map(float, latency_list)),
+                             packBits(upperTriangle(adj_flat, node_count))))
+        if len(self.pending) >= self.chunk_records:
+            return self.flush()
+        return b""
+
+    # writeRow( row )
+    #
+    # Purpose: Add one simulation laid out as a CSV record row.
+    #
+    def writeRow(self, row):
+        return self.write(*splitCsvRow(row, self.window_count))
+
+    # flush()
+    #
+    # Purpose: Write the pending records as one chunk. Returns the bytes of the chunk, b"" if nothing was pending.
+    #
+    def flush(self):
+        if not self.pending:
+            return b""
+        records = self.pending
+        links = array.array("i")
+        latencies = array.array("f")
+        for record in records:
+            links.extend(record[2])
+            latencies.extend(record[4])
+        payload = b"".join([_littleEndian(array.array("H", [r[0] for r in records])).tobytes(),
+                            _littleEndian(array.array("H", [r[1] for r in records])).tobytes(),
+                            _littleEndian(links).tobytes(),
+                            b"".join([r[3] for r in records]),
+                            _littleEndian(latencies).tobytes(),
+                            b"".join([r[5] for r in records])])
+        payload = zlib.compress(payload)
+        chunk = _CHUNK_HEADER.pack(len(records), len(payload), zlib.crc32(payload) & 0xFFFFFFFF) + payload
+        self.f.write(chunk)
+        self.record_count += len(records)
+        self.pending = []
+        return chunk
+
+    def close(self):
+        if self.f is None:
+            return
+        self.flush()
+        self.f.seek(len(MAGIC))
+        self.f.write(struct.pack("<I", self.record_count))
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.f.close()
+        self.f = None
+
+
+###
+### Read the records of a shard one chunk at a time.
+### Iterating yields (node_count, central_node_index, alarm_list, latencies, edges, removed_link) per record, where
+### latencies is a float32 array of WINDOW_COUNT * node_count values, edges lists the (i, j), i < j, links of
+### adj_matrix and removed_link is the (i, j) link missing from the failure matrix or None.
+###
+class ShardReader(object):
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, "rb") as f:
+            magic, count, header_length = _FILE_HEADER.unpack(f.read(_FILE_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(file_name + " is not a network simulator shard")
+            self.parameters = json.loads(f.read(header_length).decode("utf-8"))
+            self.data_start = f.tell()
+        self.complete = count != OPEN_COUNT
+        self.parameters["SIMULATION_COUNT"] = count if self.complete else None
+        self.window_count = int(self.parameters["WINDOW_COUNT"])
+
+    # readChunk( f )
+    #
+    # Purpose: Read the chunk at the current position of the open shard f. Returns (record count, decompressed
+    # payload), or None where the chunks end or the last one was cut short.
+    #
+    def readChunk(self, f):
+        chunk_header = f.read(_CHUNK_HEADER.size)
+        if len(chunk_header) < _CHUNK_HEADER.size:
+            return None
+        count, length, crc = _CHUNK_HEADER.unpack(chunk_header)
+        payload = f.read(length)
+        if len(payload) < length:
+            return None
+        if zlib.crc32(payload) & 0xFFFFFFFF != crc:
+            raise ValueError("corrupt chunk in " + self.file_name)
+        return count, zlib.decompress(payload)
+
+    # chunks( offsets )
+    #
+    # Purpose: Yield (record count, payload) for every chunk, or (offset, record count, payload) if offsets is True.
+    #
+    def chunks(self, offsets=False):
+        with open(self.file_name, "rb") as f:
+            f.seek(self.data_start)
+            while True:
+                offset = f.tell()
+                chunk = self.readChunk(f)
+                if chunk is None:
+                    return
+                yield (offset,) + chunk if offsets else chunk
+
+    # chunkSpans()
+    #
+    # Purpose: Yield (offset, length) of every whole chunk, header included, reading only the chunk headers.
+    #
+    def chunkSpans(self):
+        size = os.path.getsize(self.file_name)
+        with open(self.file_name, "rb") as f:
+            offset = self.data_start
+            while True:
+                f.seek(offset)
+                chunk_header = f.read(_CHUNK_HEADER.size)
+                if len(chunk_header) < _CHUNK_HEADER.size:
+                    return
+                length = _CHUNK_HEADER.size + _CHUNK_HEADER.unpack(chunk_header)[1]
+                if offset + length > size:
+                    return
+                yield offset, length
+                offset += length
+
+    def __iter__(self):
+        for count, payload in self.chunks():
+            for record in self.decodeChunk(count, payload):
+                yield record
+
+    # _columns( count, payload )
+    #
+    # Purpose: Return the node counts, central nodes and removed links columns of a chunk and the offset where its
+    # alarm bits start.
+    #
+    def _columns(self, count, payload):
+        offset = 0
+        columns = []
+        for typecode, length in (("H", count), ("H", count), ("i", 2 * count)):
+            column = array.array(typecode)
+            column.frombytes(payload[offset:offset + length * column.itemsize])
+            columns.append(_littleEndian(column))
+            offset += length * column.itemsize
+        return columns + [offset]
+
+    def _record(self, n, central_node, link, alarm_bytes, latencies, adj_bytes):
+        return (n,
+                central_node,
+                [int(c) for c in unpackBits(alarm_bytes, n)],
+                latencies,
+                triangleEdges(unpackBits(adj_bytes, triangleSize(n)), n),
+                link if link[0] >= 0 else None)
+
+    def decodeChunk(self, count, payload):
+        node_counts, central_nodes, links, offset = self._columns(count, payload)
+        alarm_offsets = [offset]
+        for n in node_counts:
+            alarm_offsets.append(alarm_offsets[-1] + packedSize(n))
+        latencies = array.array("f")
+        latency_end = alarm_offsets[-1] + 4 * self.window_count * sum(node_counts)
+        latencies.frombytes(payload[alarm_offsets[-1]:latency_end])
+        _littleEndian(latencies)
+
+        latency_offset = 0
+        adj_offset = latency_end
+        for r in range(count):
+            n = node_counts[r]
+            adj_size = packedSize(triangleSize(n))
+            yield self._record(n, central_nodes[r], (links[2 * r], links[2 * r + 1]),
+                               payload[alarm_offsets[r]:alarm_offsets[r + 1]],
+                               latencies[latency_offset:latency_offset + self.window_count * n],
+                               payload[adj_offset:adj_offset + adj_size])
+            latency_offset += self.window_count * n
+            adj_offset += adj_size
+
+    # decodeRecord( count, payload, position )
+    #
+    # Purpose: Decode only record number position of a chunk, as decodeChunk() would yield it. The records before it
+    # are skipped by their sizes, from the node counts column, without unpacking them.
+    #
+    def decodeRecord(self, count, payload, position):
+        node_counts, central_nodes, links, offset = self._columns(count, payload)
+        if not 0 <= position < count:
+            raise IndexError("record " + str(position) + " is not in a chunk of " + str(count))
+        n = node_counts[position]
+        earlier = node_counts[:position]
+        alarm_start = offset + sum(packedSize(m) for m in earlier)
+        latency_start = offset + sum(packedSize(m) for m in node_counts) + 4 * self.window_count * sum(earlier)
+        adj_start = offset + sum(packedSize(m) for m in node_counts) + 4 * self.window_count * sum(node_counts) + \
+            sum(packedSize(triangleSize(m)) for m in earlier)
+        latencies = array.array("f")
+        latencies.frombytes(payload[latency_start:latency_start + 4 * self.window_count * n])
+        return self._record(n, central_nodes[position], (links[2 * position], links[2 * position + 1]),
+                            payload[alarm_start:alarm_start + packedSize(n)],
+                            _littleEndian(latencies),
+                            payload[adj_start:adj_start + packedSize(triangleSize(n))])
+
+
+# convertCsv( csv_name, shard_name )
+#
+# Purpose: Write the records of a dataWLatency*.csv file to a shard. Returns the shard's file name.
+#
+def convertCsv(csv_name, shard_name=None, chunk_records=CHUNK_RECORDS):
+    if shard_name is None:
+        shard_name = (csv_name[:-4] if csv_name.endswith(".csv") else csv_name) + EXTENSION
+    with open(csv_name, "r") as f:
+        reader = csv.reader(f)
+        header = toInts(next(reader))
+        parameters = dict(zip(FILE_PARAMETERS, header))
+        with ShardWriter(shard_name, parameters, chunk_records) as writer:
+            for row in reader:
+                if row:
+                    writer.writeRow(row)
+    return shard_name
+
+
+# main( argv )
+#
+# Purpose: Convert CSV files to shards, the netsim convert command.
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert dataWLatency*.csv files to shards")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--chunk-records", type=int, default=CHUNK_RECORDS)
+    args = parser.parse_args(argv)
+
+    for name in args.files:
+        print("wrote to " + convertCsv(name, chunk_records=args.chunk_records))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Link cut analysis of simulator.py topologies in linear time.
+
+A CutAnalysis runs one iterative depth first search (Tarjan's bridge finding) over a topology.Topology from the
+central node. It classifies every link as a bridge, whose cut partitions the network, or a cycle link, whose cut
+does not. For each bridge it knows the switches cut off from the central node: the search subtree below the bridge,
+kept as a slice of the preorder, so all the sets together take O(node_count) space. expectedAlarms() turns a cut into
+the alarm labels the simulator would measure, host i hanging off switch i, without sending a ping.
+
+sampleCut() draws a cut stratified by class: a bridge with probability partition_ratio, otherwise a cycle link, each
+uniformly within its class. That fixes the share of partitioning cuts in a dataset instead of leaving it to the
+topology's mix of loops and branches.
+
+"""
+
+import array
+
+
+class CutAnalysis(object):
+    def __init__(self, topology, root=0):
+        self.topology = topology
+        self.root = root
+        node_count = topology.node_count
+        adjacency = [[] for _ in range(node_count)]
+        for k in range(topology.edgeCount()):
+            adjacency[topology.src[k]].append((topology.dst[k], k))
+            adjacency[topology.dst[k]].append((topology.src[k], k))
+
+        self.is_bridge = array.array("b", bytes(topology.edgeCount()))
+        self.child = array.array("i", [-1] * topology.edgeCount())  # lower end of each search tree link
+        self.pre = array.array("i", [-1] * node_count)  # preorder number, -1 if not connected to root
+        self.size = array.array("i", [1] * node_count)  # switches in the search subtree
+        self.order = array.array("i", [root])  # switches in preorder
+        low = array.array("i", [0] * node_count)
+        self.pre[root] = 0
+        stack = [[root, -1, 0]]  # switch, link to its parent, next adjacency entry
+        while stack:
+            frame = stack[-1]
+            node, parent_link, i = frame
+            if i < len(adjacency[node]):
+                frame[2] += 1
+                neighbour, k = adjacency[node][i]
+                if k == parent_link:
+                    continue
+                if self.pre[neighbour] < 0:
+                    self.pre[neighbour] = low[neighbour] = len(self.order)
+                    self.order.append(neighbour)
+                    self.child[k] = neighbour
+                    stack.append([neighbour, k, 0])
+                elif self.pre[neighbour] < low[node]:
+                    low[node] = self.pre[neighbour]
+                continue
+            stack.pop()
+            if stack:
+                parent = stack[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+                self.size[parent] += self.size[node]
+                if low[node] > self.pre[parent]:
+                    self.is_bridge[parent_link] = 1
+
+        self.bridges = [k for k in range(topology.edgeCount()) if self.is_bridge[k]]
+        self.cycle_links = [k for k in range(topology.edgeCount()) if not self.is_bridge[k]]
+
+    # disconnected( k )
+    #
+    # Purpose: The switches that cutting link k (None for no cut) cuts off from the root.
+    #
+    def disconnected(self, k):
+        if k is None or not self.is_bridge[k]:
+            return []
+        start = self.pre[self.child[k]]
+        return list(self.order[start:start + self.size[self.child[k]]])
+
+    # expectedAlarms( k )
+    #
+    # Purpose: The alarm list (1 for each host the central host cannot reach) after cutting link k, None for no cut.
+    #
+    def expectedAlarms(self, k):
+        alarms = [0 if pre >= 0 else 1 for pre in self.pre]
+        for node in self.disconnected(k):
+            alarms[node] = 1
+        return alarms
+
+
+# sampleCut( rng, analysis, partition_ratio )
+#
+# Purpose: Draw a link of the analysed topology with rng: a bridge with probability partition_ratio, otherwise a
+# cycle link. Falls back to the other class when one is empty.
+#
+def sampleCut(rng, analysis, partition_ratio):
+    if analysis.bridges and (not analysis.cycle_links or rng.random() < partition_ratio):
+        return analysis.bridges[rng.randrange(len(analysis.bridges))]
+    return analysis.cycle_links[rng.randrange(len(analysis.cycle_links))]
@@ -0,0 +1,158 @@
+"""
+Expected latencies from a central node, before and after one link is cut, computed from the topology instead of
+measured.
+
+LatencyOracle builds the lowest delay path tree of the central node once. Cutting a link that is not on the tree
+changes nothing; cutting a tree link only changes the nodes below it, so afterCut() re-runs Dijkstra on that subtree
+alone, seeded from the links that lead into it from the rest of the tree.
+
+Latencies are round trip delays in ms (twice the sum of the link delays on the path), with the same conventions as
+the data files: 0 for the central node and for nodes that cannot be reached.
+
+"""
+
+import heapq
+
+from .analyticNet import shortestPaths
+
+
+class LatencyOracle(object):
+    def __init__(self, node_count, edges, delays, central_node_index):
+        self.node_count = node_count
+        self.central_node_index = central_node_index
+        self.adjacency = dict((i, []) for i in range(node_count))
+        self.edgeIds = {}
+        for edge_id, (i, j) in enumerate(edges):
+            self.adjacency[i].append((j, float(delays[edge_id]), edge_id))
+            self.adjacency[j].append((i, float(delays[edge_id]), edge_id))
+            self.edgeIds[(min(i, j), max(i, j))] = edge_id
+        self.dist, self.parent = shortestPaths(self.adjacency, central_node_index)
+        self._eulerTour()
+        self.base = self._latencies(self.dist)
+        self.baseDisconnected = [0 if j in self.dist else 1 for j in range(node_count)]
+
+    # fromMatrices( adj_matrix, delay_matrix, central_node_index )
+    #
+    # Purpose: Build an oracle from an adjacency matrix and a matrix of link delays in ms.
+    #
+    @classmethod
+    def fromMatrices(cls, adj_matrix, delay_matrix, central_node_index):
+        edges = []
+        delays = []
+        for i in range(len(adj_matrix)):
+            for j in range(i + 1, len(adj_matrix)):
+                if adj_matrix[i][j]:
+                    edges.append((i, j))
+                    delays.append(delay_matrix[i][j])
+        return cls(len(adj_matrix), edges, delays, central_node_index)
+
+    # fromTopology( topology, central_node_index )
+    #
+    # Purpose: Build an oracle from a topology.Topology.
+    #
+    @classmethod
+    def fromTopology(cls, topology, central_node_index):
+        return cls(topology.node_count, topology.edges(), topology.delay, central_node_index)
+
+    def _eulerTour(self):
+        children = dict((i, []) for i in range(self.node_count))
+        for node, entry in self.parent.items():
+            if entry is not None:
+                children[entry[0]].append(node)
+        self.tin = {}
+        self.tout = {}
+        self.order = []  # nodes by tin, so a subtree is the slice order[tin[node]:tout[node]]
+        clock = 0
+        stack = [(self.central_node_index, False)]
+        while stack:
+            node, leaving = stack.pop()
+            if leaving:
+                self.tout[node] = clock
+                continue
+            self.tin[node] = clock
+            self.order.append(node)
+            clock += 1
+            stack.append((node, True))
+            for child in children[node]:
+                stack.append((child, False))
+
+    def _latencies(self, dist):
+        return [2.0 * dist[j] if j in dist and j != self.central_node_index else 0.0 for j in range(self.node_count)]
+
+    def latencies(self):
+        return list(self.base)
+
+    # treeChild( i, j )
+    #
+    # Purpose: Return the endpoint of link (i, j) below the link in the path tree, or None if the link is not
+    # on the tree.
+    #
+    def treeChild(self, i, j):
+        edge_id = self.edgeIds[(min(i, j), max(i, j))]
+        for child in (i, j):
+            entry = self.parent.get(child)
+            if entry is not None and entry[1] == edge_id:
+                return child
+        return None
+
+    # afterCut( edge )
+    #
+    # Purpose: Return (latencies, disconnected) after cutting link edge = (i, j). disconnected holds 1 for
+    # every node the central node can no longer reach, 0 otherwise.
+    #
+    def afterCut(self, edge):
+        i, j = edge
+        edge_id = self.edgeIds[(min(i, j), max(i, j))]
+        child = self.treeChild(i, j)
+        if child is None:
+            return list(self.base), list(self.baseDisconnected)
+
+        low, high = self.tin[child], self.tout[child]
+
+        def inSubtree(node):
+            return node in self.tin and low <= self.tin[node] < high
+
+        subtree = self.order[low:high]
+        dist = {}
+        heap = []
+        for node in subtree:
+            best = None
+            for neighbour, weight, link_id in self.adjacency[node]:
+                if link_id != edge_id and neighbour in self.dist and not inSubtree(neighbour):
+                    d = self.dist[neighbour] + weight
+                    if best is None or d < best:
+                        best = d
+            if best is not None:
+                dist[node] = best
+                heap.append((best, node))
+        heapq.heapify(heap)
+        done = set()
+        while heap:
+            d, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            for neighbour, weight, link_id in self.adjacency[node]:
+                if link_id != edge_id and inSubtree(neighbour):
+                    nd = d + weight
+                    if neighbour not in dist or nd < dist[neighbour]:
+                        dist[neighbour] = nd
+                        heapq.heappush(heap, (nd, neighbour))
+
+        latencies = list(self.base)
+        disconnected = list(self.baseDisconnected)
+        for node in subtree:
+            if node in dist:
+                latencies[node] = 2.0 * dist[node]
+            else:
+                latencies[node] = 0.0
+                disconnected[node] = 1
+        return latencies, disconnected
+
+    # batchAfterCut( edges )
+    #
+    # Purpose: Return afterCut(edge) for every edge, in order. Links off the path tree share the precomputed
+    # latencies, so only tree links cost a (subtree sized) search.
+    #
+    def batchAfterCut(self, edges):
+        return [self.afterCut(edge) for edge in edges]
@@ -0,0 +1,73 @@
+"""
+Per simulation metrics for simulator.py.
+
+A SimulationMetrics collects the wall-clock time of each phase of a simulation, single values (node_count,
+time_to_ready, offered and achieved flows, ...) and series of samples (probe round times, traffic dispatch lags).
+summary() reduces the series to count, mean, p50, p99 and max so each simulation becomes one JSON line, appended by
+appendMetrics() to a .metrics.jsonl file next to the data files.
+
+"""
+
+import contextlib
+import json
+import time
+
+
+# percentile( sorted_values, fraction )
+#
+# Purpose: Nearest rank percentile of an already sorted list, 0.0 if it is empty.
+#
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    rank = int(round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[rank]
+
+
+class SimulationMetrics(object):
+    def __init__(self, **values):
+        self.values = dict(values)
+        self.phases = {}
+        self.series = {}
+
+    # phase( name )
+    #
+    # Purpose: Context manager adding the wall-clock seconds spent inside it to phase name.
+    #
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.time() - start
+
+    def set(self, name, value):
+        self.values[name] = value
+
+    def record(self, name, value):
+        self.series.setdefault(name, []).append(value)
+
+    def extend(self, name, values):
+        self.series.setdefault(name, []).extend(values)
+
+    def summary(self):
+        summary = dict(self.values)
+        summary["phases"] = dict(self.phases)
+        for name, values in self.series.items():
+            ordered = sorted(values)
+            summary[name] = {"count": len(ordered),
+                             "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+                             "p50": percentile(ordered, 0.5),
+                             "p99": percentile(ordered, 0.99),
+                             "max": ordered[-1] if ordered else 0.0}
+        return summary
+
+
+# appendMetrics( file_name, summary )
+#
+# Purpose: Append one summary dict to a JSON lines file.
+#
+def appendMetrics(file_name, summary):
+    with open(file_name, 'a') as f:
+        f.write(json.dumps(summary, sort_keys=True) + "\n")
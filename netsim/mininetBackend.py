@@ -0,0 +1,115 @@
+"""
+Mininet backend of the simulator.
+
+Only the Simulator imports this module, and only when BACKEND is "mininet", so the rest of the package (topologies,
+records, decoding, analysis) works on machines without Mininet and without paying for its import.
+
+"""
+
+import logging
+import os
+import threading
+import time
+
+from mininet.link import TCLink
+from mininet.net import Mininet
+from mininet.node import RemoteController
+
+log = logging.getLogger(__name__)
+
+
+###
+### Mininet backend of the Simulator. Besides the Mininet API, a backend provides now() and sleep() for the
+### simulation's clock, probeHosts() and startTraffic(), whose result has stop(), offered and achieved;
+### analyticNet.AnalyticNet is the other backend.
+### probeHosts() pings every target from a source host at once, each ping in its own process inside the source's
+### namespace, so a round of probes costs one ping timeout and never waits on a host's shell.
+###
+class SimNet(Mininet):
+    def addController(self, name='c0', controller=RemoteController, **params):
+        return Mininet.addController(self, name, controller, **params)
+
+    def now(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def probeHosts(self, source, targets, timeout='1', count=1):
+        pings = [source.popen(['ping', '-c', str(count), '-W', str(timeout), target.IP()]) for target in targets]
+        results = []
+        for p in pings:
+            output, _ = p.communicate()
+            if not isinstance(output, str):
+                output = output.decode()
+            results.append(self._parsePingFull(output))
+        return results
+
+    # startTraffic( schedule, port, drain_timeout )
+    #
+    # Purpose: Start playing a traffic.trafficSchedule() on the hosts, with iperf on port. Returns the running
+    # TrafficEngine, whose stop() waits up to drain_timeout seconds for running flows.
+    #
+    def startTraffic(self, schedule, port, drain_timeout):
+        engine = TrafficEngine(self, schedule, port, drain_timeout)
+        engine.start()
+        return engine
+
+
+###
+### Plays a traffic schedule on a SimNet. One iperf server per host is started up front on port, then a
+### dispatcher thread launches each flow's client with popen at its scheduled time, so launches never wait on a
+### host's shell. offered counts the launched flows, achieved the ones whose client finished successfully, and
+### dispatch_lags holds how late each launch was in seconds.
+###
+class TrafficEngine(threading.Thread):
+    def __init__(self, network, schedule, port, drain_timeout):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.network = network
+        self.schedule = schedule
+        self.port = port
+        self.drain_timeout = drain_timeout
+        self.servers = []
+        self.clients = []
+        self.offered = 0
+        self.achieved = 0
+        self.dispatch_lags = []
+        self.stopping = threading.Event()
+        self.devnull = open(os.devnull, 'w')
+
+    def run(self):
+        hosts = self.network.hosts
+        for host in hosts:
+            self.servers.append(host.popen(['iperf', '-s', '-p', str(self.port)],
+                                           stdout=self.devnull, stderr=self.devnull))
+        start = time.time()
+        for flow in self.schedule:
+            if self.stopping.wait(start + flow.start - time.time()):
+                break
+            self.dispatch_lags.append(max(0.0, time.time() - (start + flow.start)))
+            self.clients.append(hosts[flow.src].popen(['iperf', '-c', hosts[flow.dst].IP(),
+                                                       '-p', str(self.port), '-t', str(flow.duration)],
+                                                      stdout=self.devnull, stderr=self.devnull))
+            self.offered += 1
+
+    # stop()
+    #
+    # Purpose: Stop launching flows, give running clients up to drain_timeout seconds to finish,
+    # then count the achieved flows and kill every iperf process.
+    #
+    def stop(self):
+        self.stopping.set()
+        self.join()
+        deadline = time.time() + self.drain_timeout
+        for client in self.clients:
+            while client.poll() is None and time.time() < deadline:
+                time.sleep(0.1)
+        self.achieved = sum(1 for client in self.clients if client.poll() == 0)
+        for process in self.clients + self.servers:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        self.devnull.close()
+        log.info("Traffic: %d of %d flows completed", self.achieved, self.offered)
@@ -0,0 +1,144 @@
+"""
+Raw probe samples of simulator.py.
+
+A SampleBuffer keeps every probe of a measurement: one round per probeHosts() call, holding for each node the
+timestamp, packets sent and received and the min, avg, max and mdev round trip times in ms. Each field is one
+preallocated float64 array of capacity rounds x node_count, filled as a ring, so a buffer never grows however long
+the measurement runs; once it is full the oldest round is overwritten.
+
+windowStatistics() reduces a run of rounds to one (mean, p50, p99, loss rate) per node. The mean and percentiles are
+taken over the avg RTT of the probes that got an answer, so lost probes no longer pull the mean down; a node that
+answered none of them gets 0.0.
+
+Buffers can be appended to a samples file (<shard>.samples) next to the data files:
+
+    per record:
+        record number   uint32, position of the record in its shard file, from 0
+        rounds          uint32
+        node count      uint32
+        fields          float64, each field's rounds x node_count values in FIELDS order, oldest round first
+
+A record that was written again after an interruption appears twice; readers keep the last one.
+
+"""
+
+import array
+import struct
+import sys
+
+from . import metrics
+
+FIELDS = ["timestamp", "sent", "received", "rttmin", "rttavg", "rttmax", "rttdev"]
+TIMESTAMP, SENT, RECEIVED, RTTMIN, RTTAVG, RTTMAX, RTTDEV = range(len(FIELDS))
+
+_RECORD_HEADER = struct.Struct("<III")
+
+
+class SampleBuffer(object):
+    def __init__(self, node_count, capacity):
+        self.node_count = node_count
+        self.capacity = capacity
+        self.rounds = 0  # rounds added so far, including overwritten ones
+        self.fields = [array.array("d", bytes(8 * capacity * node_count)) for _ in FIELDS]
+
+    # add( timestamp, results )
+    #
+    # Purpose: Store one round, results holding a (sent, received, rttmin, rttavg, rttmax, rttdev) tuple per node.
+    #
+    def add(self, timestamp, results):
+        base = (self.rounds % self.capacity) * self.node_count
+        fields = self.fields
+        for n, result in enumerate(results):
+            fields[TIMESTAMP][base + n] = timestamp
+            for f in range(len(result)):
+                fields[SENT + f][base + n] = result[f]
+        self.rounds += 1
+
+    def available(self):
+        return min(self.rounds, self.capacity)
+
+    # column( field, first_round, round_count, n )
+    #
+    # Purpose: Values of one field of node n over round_count rounds from round number first_round. The rounds must
+    # still be in the buffer.
+    #
+    def column(self, field, first_round, round_count, n):
+        if first_round < self.rounds - self.capacity or first_round + round_count > self.rounds:
+            raise IndexError("rounds %d to %d are not in the buffer" % (first_round, first_round + round_count))
+        values = self.fields[field]
+        step = self.node_count
+        start = (first_round % self.capacity) * step + n
+        end = start + round_count * step
+        if end <= len(values):
+            return values[start:end:step]
+        return values[start::step] + values[n:end - len(values):step]
+
+    # windowStatistics( first_round, round_count )
+    #
+    # Purpose: Return one (mean, p50, p99, loss rate) tuple per node over round_count rounds from first_round.
+    #
+    def windowStatistics(self, first_round, round_count):
+        statistics = []
+        for n in range(self.node_count):
+            sent = sum(self.column(SENT, first_round, round_count, n))
+            received = self.column(RECEIVED, first_round, round_count, n)
+            rtts = sorted(rtt for rtt, answered in zip(self.column(RTTAVG, first_round, round_count, n), received)
+                          if answered > 0 and rtt > 0.0)
+            statistics.append((sum(rtts) / len(rtts) if rtts else 0.0,
+                               metrics.percentile(rtts, 0.5),
+                               metrics.percentile(rtts, 0.99),
+                               1.0 - sum(received) / sent if sent else 0.0))
+        return statistics
+
+    # toBytes( index )
+    #
+    # Purpose: The rounds still in the buffer, oldest first, laid out as the samples file entry of record number index.
+    #
+    def toBytes(self, index=0):
+        rounds = self.available()
+        first = self.rounds - rounds
+        parts = [_RECORD_HEADER.pack(index, rounds, self.node_count)]
+        for f in range(len(FIELDS)):
+            start = (first % self.capacity) * self.node_count
+            values = self.fields[f][start:] + self.fields[f][:start]
+            values = values[:rounds * self.node_count]
+            if sys.byteorder != "little":
+                values.byteswap()
+            parts.append(values.tobytes())
+        return b"".join(parts)
+
+
+# appendSamples( file_name, index, buffer )
+#
+# Purpose: Append the samples of record number index to a samples file.
+#
+def appendSamples(file_name, index, buffer):
+    with open(file_name, "ab") as f:
+        f.write(buffer.toBytes(index))
+
+
+# readSamples( file_name )
+#
+# Purpose: Return {record number: SampleBuffer} for a samples file, keeping the last copy of each record.
+#
+def readSamples(file_name):
+    buffers = {}
+    with open(file_name, "rb") as f:
+        while True:
+            header = f.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                return buffers
+            index, rounds, node_count = _RECORD_HEADER.unpack(header)
+            size = 8 * rounds * node_count
+            buffer = SampleBuffer(node_count, max(rounds, 1))
+            for f_index in range(len(FIELDS)):
+                data = f.read(size)
+                if len(data) < size:
+                    return buffers
+                if rounds:
+                    buffer.fields[f_index] = array.array("d")
+                    buffer.fields[f_index].frombytes(data)
+                    if sys.byteorder != "little":
+                        buffer.fields[f_index].byteswap()
+            buffer.rounds = rounds
+            buffers[index] = buffer
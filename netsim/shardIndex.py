@@ -0,0 +1,245 @@
+"""
+Random access to the records of simulator.py data files.
+
+An index (<file>.idx) is built once per dataWLatency*.csv file or shard and rebuilt whenever the file's size
+changes. It holds one fixed size entry per record:
+
+    offset          uint64, byte offset of the record's CSV line, or of the shard chunk holding the record
+    length          uint32, byte length of the CSV line (0 for shards)
+    position        uint16, position of the record within its chunk (0 for CSV files)
+    node_count      uint16
+    central         uint16, central_node_index
+    alarms          uint16, number of alarmed nodes
+    cut             uint8, 1 if a link was cut
+
+after a header of magic b"NSIMIDX1", the entry count (uint32), the size of the indexed file (uint64), WINDOW_COUNT
+and LINK_CUT_WINDOW (uint32 each). All integers are little endian.
+
+A DatasetReader loads the indexes of any number of files into columns, numbers their records one after the other,
+fetches record i with a single seek (and at most one chunk decompression, unpacking only that record), keeping at
+most MAX_OPEN_FILES files open, and answers select() filters from the columns alone, without reading any record:
+
+    reader = DatasetReader(dataDecoder.findShards("data"))
+    cut_records = reader.select(cut=True, min_nodes=30, max_nodes=60)
+    record = reader[cut_records[0]]
+
+Build or refresh the indexes of existing files with:
+    python -m netsim index dataWLatency1t0.csv [more files ...]
+
+"""
+
+import argparse
+import array
+import bisect
+import collections
+import csv
+import os
+import struct
+
+from . import dataDecoder
+from . import dataFormat
+
+MAGIC = b"NSIMIDX1"
+EXTENSION = ".idx"
+MAX_OPEN_FILES = 32  # files a DatasetReader keeps open, the least recently read is closed first
+
+_HEADER = struct.Struct("<8sIQII")
+_ENTRY = struct.Struct("<QIHHHHB")
+_COLUMNS = [("offsets", "Q"), ("lengths", "I"), ("positions", "H"), ("node_counts", "H"), ("centrals", "H"),
+            ("alarms", "H"), ("cuts", "B")]
+
+
+def indexName(file_name):
+    return file_name + EXTENSION
+
+
+def _csvEntries(file_name):
+    entries = []
+    with open(file_name, "rb") as f:
+        header = dataFormat.toInts(next(csv.reader([f.readline().decode("utf-8")])))
+        window_count = header[dataFormat.FILE_PARAMETERS.index("WINDOW_COUNT")]
+        link_cut_window = header[dataFormat.FILE_PARAMETERS.index("LINK_CUT_WINDOW")]
+        offset = f.tell()
+        for line in f:
+            row = next(csv.reader([line.decode("utf-8")]), None)
+            if row:
+                node_count, central_node_index, alarms, latencies, adj_flat, failure_flat = \
+                    dataFormat.splitCsvRow(row, window_count)
+                entries.append((offset, len(line), 0, node_count, central_node_index,
+                                sum(dataFormat.toInts(alarms)), 1 if adj_flat != failure_flat else 0))
+            offset += len(line)
+    return entries, window_count, link_cut_window
+
+
+def _shardEntries(file_name):
+    reader = dataFormat.ShardReader(file_name)
+    entries = []
+    for offset, count, payload in reader.chunks(offsets=True):
+        for position, record in enumerate(reader.decodeChunk(count, payload)):
+            node_count, central_node_index, alarm_list, latencies, edges, removed_link = record
+            entries.append((offset, 0, position, node_count, central_node_index, sum(alarm_list),
+                            1 if removed_link is not None else 0))
+    return entries, reader.window_count, int(reader.parameters["LINK_CUT_WINDOW"])
+
+
+# buildIndex( file_name )
+#
+# Purpose: Scan a CSV file or shard once and write its index. Returns the index's file name.
+#
+def buildIndex(file_name):
+    size = os.path.getsize(file_name)
+    if file_name.endswith(dataFormat.EXTENSION):
+        entries, window_count, link_cut_window = _shardEntries(file_name)
+    else:
+        entries, window_count, link_cut_window = _csvEntries(file_name)
+    with open(indexName(file_name), "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(entries), size, window_count, link_cut_window))
+        for entry in entries:
+            f.write(_ENTRY.pack(*entry))
+    return indexName(file_name)
+
+
+###
+### The index of one file, as one array per entry field.
+###
+class ShardIndex(object):
+    def __init__(self, file_name):
+        self.file_name = file_name
+        if not self._load():
+            buildIndex(file_name)
+            self._load()
+
+    # _load()
+    #
+    # Purpose: Read the file's index into columns. Returns False if there is none or it is out of date.
+    #
+    def _load(self):
+        try:
+            with open(indexName(self.file_name), "rb") as f:
+                data = f.read()
+        except IOError:
+            return False
+        if len(data) < _HEADER.size:
+            return False
+        magic, count, size, self.window_count, self.link_cut_window = _HEADER.unpack_from(data)
+        if magic != MAGIC or size != os.path.getsize(self.file_name) or \
+                len(data) != _HEADER.size + count * _ENTRY.size:
+            return False
+        columns = [array.array(typecode) for name, typecode in _COLUMNS]
+        for entry in _ENTRY.iter_unpack(data[_HEADER.size:]):
+            for column, value in zip(columns, entry):
+                column.append(value)
+        for (name, typecode), column in zip(_COLUMNS, columns):
+            setattr(self, name, column)
+        return True
+
+    def __len__(self):
+        return len(self.offsets)
+
+
+class DatasetReader(object):
+    def __init__(self, file_names):
+        self.indexes = [ShardIndex(file_name) for file_name in file_names]
+        self.starts = [0]
+        for index in self.indexes:
+            self.starts.append(self.starts[-1] + len(index))
+        self.files = collections.OrderedDict()
+        self.shard_readers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.starts[-1]
+
+    # locate( i )
+    #
+    # Purpose: Return the ShardIndex holding record i and the record's number within it.
+    #
+    def locate(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("record " + str(i) + " out of range")
+        k = bisect.bisect_right(self.starts, i) - 1
+        return self.indexes[k], i - self.starts[k]
+
+    # _file( file_name )
+    #
+    # Purpose: Return the open file_name, opening it if needed and closing the least recently used file once
+    # MAX_OPEN_FILES are open, so shuffled reads over any number of files keep a bounded number of descriptors.
+    #
+    def _file(self, file_name):
+        if file_name in self.files:
+            self.files.move_to_end(file_name)
+        else:
+            while len(self.files) >= MAX_OPEN_FILES:
+                self.files.popitem(last=False)[1].close()
+            self.files[file_name] = open(file_name, "rb")
+        return self.files[file_name]
+
+    # __getitem__( i )
+    #
+    # Purpose: Return record i as a dataDecoder.Record.
+    #
+    def __getitem__(self, i):
+        index, j = self.locate(i)
+        f = self._file(index.file_name)
+        f.seek(index.offsets[j])
+        if index.file_name.endswith(dataFormat.EXTENSION):
+            if index.file_name not in self.shard_readers:
+                self.shard_readers[index.file_name] = dataFormat.ShardReader(index.file_name)
+            shard_reader = self.shard_readers[index.file_name]
+            count, payload = shard_reader.readChunk(f)
+            record = shard_reader.decodeRecord(count, payload, index.positions[j])
+            return dataDecoder.shardRecord(record, index.window_count, index.link_cut_window)
+        row = next(csv.reader([f.read(index.lengths[j]).decode("utf-8")]))
+        return dataDecoder.csvRecord(row, index.window_count, index.link_cut_window)
+
+    # select( cut, min_nodes, max_nodes, central_node_index, min_alarms, max_alarms )
+    #
+    # Purpose: Return the numbers of the records matching every filter given, from the indexes alone. cut=True
+    # keeps the records with a link cut, cut=False the ones without.
+    #
+    def select(self, cut=None, min_nodes=None, max_nodes=None, central_node_index=None, min_alarms=None,
+               max_alarms=None):
+        selected = []
+        for start, index in zip(self.starts, self.indexes):
+            for j, (n, central, alarms, is_cut) in enumerate(zip(index.node_counts, index.centrals, index.alarms,
+                                                                 index.cuts)):
+                if cut is not None and bool(is_cut) != cut:
+                    continue
+                if min_nodes is not None and n < min_nodes or max_nodes is not None and n > max_nodes:
+                    continue
+                if central_node_index is not None and central != central_node_index:
+                    continue
+                if min_alarms is not None and alarms < min_alarms or max_alarms is not None and alarms > max_alarms:
+                    continue
+                selected.append(start + j)
+        return selected
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files = collections.OrderedDict()
+
+
+# main( argv )
+#
+# Purpose: Build or refresh the indexes of files, the netsim index command.
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or refresh the indexes of simulator data files")
+    parser.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    for name in args.files:
+        index = ShardIndex(name)
+        print("%s: %d records, %d with a cut link" % (indexName(name), len(index), sum(index.cuts)))
+
+
+if __name__ == "__main__":
+    main()
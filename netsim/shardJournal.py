@@ -0,0 +1,235 @@
+"""
+Crash safe, streaming shard files for simulator.py.
+
+A StreamingShard appends each simulation's record to its dataWLatency*.csv or .nsd file as soon as the record
+arrives and forces it to disk, then logs it in a journal next to the file (<file>.journal):
+
+    first line      JSON object with the shard's file wide variables
+    one line per simulation
+                    simulation index, byte offset, byte length and crc32 of the record's bytes in the file
+
+A simulation that produced no record (too small a network) is logged with length 0 so it is not run again.
+close() fills in the record count of the file header and then deletes the journal, so a shard file without a
+journal is complete.
+
+Opening a shard that still has a journal resumes it: the records whose bytes match their checksum are kept,
+anything after the last good record is cut off, and completed holds the simulation indices that need not be run
+again. CSV files are written with the record count zero padded to COUNT_WIDTH digits so it can be rewritten in place.
+.nsd files get one chunk per record.
+
+"""
+
+import csv
+import io
+import json
+import os
+import struct
+import zlib
+
+from . import dataFormat
+
+JOURNAL_EXTENSION = ".journal"
+COUNT_WIDTH = 10
+
+
+def journalName(file_name):
+    return file_name + JOURNAL_EXTENSION
+
+
+# isComplete( file_name )
+#
+# Purpose: True if the shard file exists and was closed.
+#
+def isComplete(file_name):
+    return os.path.exists(file_name) and not os.path.exists(journalName(file_name))
+
+
+# csvLine( row )
+#
+# Purpose: Return one CSV row as the bytes csv.writer writes for it.
+#
+def csvLine(row):
+    text = io.StringIO()
+    csv.writer(text).writerow(row)
+    return text.getvalue().encode("utf-8")
+
+
+def _crc(data):
+    return zlib.crc32(data) & 0xFFFFFFFF
+
+
+def _sync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _parameters(parameters):
+    return dict((k, v) for k, v in parameters.items() if k != "SIMULATION_COUNT")
+
+
+# _dataStart( file_name )
+#
+# Purpose: Byte offset of the first record in a shard file, or None if the file header was not written out.
+#
+def _dataStart(file_name):
+    if file_name.endswith(dataFormat.EXTENSION):
+        try:
+            return dataFormat.ShardReader(file_name).data_start
+        except (ValueError, struct.error):
+            return None
+    with open(file_name, "rb") as f:
+        header = f.readline()
+    count = header.split(b",", 1)[0]
+    if not header.endswith(b"\n") or len(count) != COUNT_WIDTH or not count.isdigit():
+        return None
+    return len(header)
+
+
+# recover( file_name, parameters )
+#
+# Purpose: Return the (index, offset, length, crc) journal entries of an unfinished shard whose records are intact,
+# in file order, and the byte offset where the last of them ends, or None if the shard has to be started over.
+# Raises ValueError if the shard was started with other parameters. Reads the files without changing them.
+#
+def recover(file_name, parameters):
+    if not (os.path.exists(journalName(file_name)) and os.path.exists(file_name)):
+        return None
+    with open(journalName(file_name), "r") as journal:
+        lines = journal.read().split("\n")
+    try:
+        journal_parameters = json.loads(lines[0])
+    except ValueError:
+        return None
+    if journal_parameters != _parameters(parameters):
+        raise ValueError(file_name + " was started with different parameters, move it away to restart it")
+    end = _dataStart(file_name)
+    if end is None:
+        return None
+    entries = []
+    with open(file_name, "rb") as f:
+        for line in lines[1:]:
+            fields = line.split()
+            if len(fields) != 4:
+                break
+            index, offset, length, crc = map(int, fields)
+            if offset != end:
+                break
+            f.seek(offset)
+            if _crc(f.read(length)) != crc:
+                break
+            entries.append((index, offset, length, crc))
+            end = offset + length
+    return entries, end
+
+
+# completedSimulations( file_name, parameters )
+#
+# Purpose: The simulation indices an unfinished shard already holds, without opening it for writing.
+#
+def completedSimulations(file_name, parameters):
+    recovered = recover(file_name, parameters)
+    if recovered is None:
+        return set()
+    return set(entry[0] for entry in recovered[0])
+
+
+class StreamingShard(object):
+    def __init__(self, file_name, parameters):
+        self.file_name = file_name
+        self.parameters = _parameters(parameters)
+        self.binary = file_name.endswith(dataFormat.EXTENSION)
+        self.completed = set()
+        self.record_count = 0
+        self.writer = None
+        recovered = recover(file_name, parameters)
+        if recovered is None:
+            self._create()
+        else:
+            self._resume(*recovered)
+
+    def _count(self, count):
+        return ("%0*d" % (COUNT_WIDTH, count)).encode("ascii")
+
+    def _csvHeader(self, count):
+        return csvLine([self._count(count).decode("ascii")] +
+                       [self.parameters[name] for name in dataFormat.FILE_PARAMETERS[1:]])
+
+    def _create(self):
+        with open(journalName(self.file_name), "w") as journal:
+            journal.write(json.dumps(self.parameters, sort_keys=True) + "\n")
+            _sync(journal)
+        if self.binary:
+            self.writer = dataFormat.ShardWriter(self.file_name, self.parameters, chunk_records=1)
+            self.f = self.writer.f
+        else:
+            self.f = open(self.file_name, "wb")
+            self.f.write(self._csvHeader(0))
+        _sync(self.f)
+        self.journal = open(journalName(self.file_name), "a")
+
+    def _resume(self, entries, end):
+        for index, offset, length, crc in entries:
+            self.completed.add(index)
+            if length:
+                self.record_count += 1
+        if self.binary:
+            self.writer = dataFormat.ShardWriter(self.file_name, self.parameters, chunk_records=1,
+                                                 resume=(end, self.record_count))
+            self.f = self.writer.f
+        else:
+            self.f = open(self.file_name, "r+b")
+            self.f.truncate(end)
+            self.f.seek(end)
+        _sync(self.f)
+        # Drop the entries after the last good record, the records they point at are gone
+        temporary = journalName(self.file_name) + ".tmp"
+        with open(temporary, "w") as journal:
+            journal.write(json.dumps(self.parameters, sort_keys=True) + "\n")
+            for entry in entries:
+                journal.write("%d %d %d %d\n" % entry)
+            _sync(journal)
+        os.replace(temporary, journalName(self.file_name))
+        self.journal = open(journalName(self.file_name), "a")
+
+    # add( index, row )
+    #
+    # Purpose: Append the CSV record row of simulation index, or only mark it done if row is None, and make
+    # both durable before returning.
+    #
+    def add(self, index, row):
+        offset = self.f.tell()
+        data = b""
+        if row is not None:
+            if self.binary:
+                data = self.writer.writeRow(row)
+            else:
+                data = csvLine(row)
+                self.f.write(data)
+            _sync(self.f)
+            self.record_count += 1
+        self.journal.write("%d %d %d %d\n" % (index, offset, len(data), _crc(data)))
+        _sync(self.journal)
+        self.completed.add(index)
+
+    # close()
+    #
+    # Purpose: Write the record count into the file header and delete the journal.
+    #
+    def close(self):
+        if self.binary:
+            self.writer.close()
+        else:
+            self.f.seek(0)
+            self.f.write(self._count(self.record_count))
+            _sync(self.f)
+            self.f.close()
+        self.journal.close()
+        os.remove(journalName(self.file_name))
+
+    # detach()
+    #
+    # Purpose: Close the files without finishing the shard, so a later run resumes it.
+    #
+    def detach(self):
+        self.f.close()
+        self.journal.close()
@@ -0,0 +1,773 @@
+"""
+Simulates networks of random networks with random traffic. Stores data that can be decoded with dataDecoder.py.
+After measuring the ping latency from a central node to all nodes of a specified number of window within a window of specified length of time, a random link is cut. Then the ping latency is found for all nodes from a central node for a specified number of windows before the program finishes.
+Data includes the average ping latency from a central node recorded over a set number of windows.
+Run controller(s) at CONTROLLER_IPS ("ip" for port 6633, or "ip:port"). Each network is assigned to the least loaded
+healthy controller, see controllerPool.py.
+
+Simulations run in WORKER_COUNT processes fed from a task queue. Each worker names its switches and hosts within its
+own namespace (w<worker>s<i>, w<worker>h<i>), sends every finished record back over a pipe, and the main process
+appends it to its file at once through shardJournal.py. Stopping and running the program again skips the files that
+are complete and the simulations that are already saved.
+
+Each simulation builds one network and measures EXPERIMENTS_PER_NETWORK records on it, each from its own central
+node and link cut. The cut link is brought back up and the network given time to reconverge between experiments.
+Samples (topology, central node, cut link) already in the TOPOLOGY_CACHE of the output directory, compared up to
+isomorphism by topologyCache.py, are handled according to DUPLICATE_POLICY before the network is built.
+
+Written by ECE capstone 2020-21 G20 at the University of Manitoba.
+
+"""
+
+
+import argparse
+import ast
+import copy
+import json
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import random
+import time
+
+from . import analyticNet
+from . import controllerPool
+from . import dataFormat
+from . import graphAnalysis
+from . import metrics
+from . import probeSamples
+from . import shardJournal
+from . import sweep
+from . import topology
+from . import topologyCache
+from . import traffic
+
+SIMULATIONS_PER_FILE = 1  # records per shard
+EXPERIMENTS_PER_NETWORK = 1  # records measured on each built network, restoring the cut link in between
+FILES = 1
+FILE_START_NUMBER = 1
+SHARD_COUNT = 8  # dataWLatency<file>t<shard> files written for each file number
+WORKER_COUNT = 8  # simulation processes
+SIMULATION_ATTEMPTS = 2  # runs of a simulation that raises an error before it is given up
+CONTROLLER_IPS = ["192.168.56.102", "192.168.57.102"]
+
+MAX_LOOP_SIZE = 15  # 100
+MAX_BRANCH_SIZE = 15
+MIN_NODE = 10  # but the actual limitation should be MIN_NODE + MAX_LOOP_SIZE = 25
+MAX_NODE = 75
+
+TIME_BETWEEN_PINGS = 30  # s
+PINGS_PER_WINDOW = 4
+WINDOW_COUNT = 5
+LINK_CUT_WINDOW = 2
+MAX_TRAFFIC_DURATION = 5
+IPERF_PORT = 5001
+MAX_LINK_DELAY = 5  # ms
+MAX_LINK_LOSS = 1
+TRAFFIC_LEVEL = 0.05
+CHANCE_OF_NO_LINK_CUT = 0.2
+PARTITION_CUT_RATIO = 0.0  # fraction of link cuts drawn from the bridges, which partition the network
+PREDICT_ALARMS = False  # take alarm labels from graphAnalysis.py instead of pinging every host after measuring
+CROSS_CHECK_REACHABILITY = True  # compare detectLinkFaults with the connectivity of adj_matrix_new
+READY_TIMEOUT = 300  # s, longest wait for the network to come up before measuring anyway
+READY_POLL_INTERVAL = 2  # s between readiness sweeps
+READY_STABLE_SWEEPS = 3  # consecutive sweeps that must reach every host
+BACKEND = "mininet"  # "mininet" or "analytic" to compute latencies with analyticNet.py instead of emulating
+OUTPUT_FORMAT = "csv"  # "csv" or "nsd" for the binary shards of dataFormat.py
+TOPOLOGY_CACHE = "topologies.sqlite"  # cache of the samples drawn, in each output directory; None to disable
+DUPLICATE_POLICY = "resample"  # for samples already cached: "keep" them, "skip" them (no record) or "resample"
+RESAMPLE_ATTEMPTS = 20  # draws per experiment before giving up on finding a new sample
+OUTPUT_SAMPLES = False  # also write every probe of every record to <shard>.samples, see probeSamples.py
+LOG_LEVEL = logging.INFO  # logging.DEBUG also shows deleted links and disconnected node lists
+
+log = logging.getLogger(__name__)
+
+###
+### Probe the other_nodes from the central_node_input in rounds according to the WINDOW_COUNT, PINGS_PER_WINDOW,
+### and TIME_BETWEEN_PINGS. Rounds are scheduled from the start time so slow rounds do not shift the sampling interval.
+### Every probe is kept with its timestamp in the probeSamples.SampleBuffer samples, node n being other_nodes[n].
+### window_statistics holds the (mean, p50, p99, loss rate) of each node for each window, and latency_lists the mean
+### latencies of each window for each node, taken over the probes that were answered.
+###
+class ProbeEngine(object):
+    def __init__(self, network, central_node_input, other_nodes, simulation_metrics=None):
+        self.network = network
+        self.simulation_metrics = simulation_metrics
+        self.central_node_input = central_node_input
+        self.other_nodes = other_nodes
+        self.samples = probeSamples.SampleBuffer(len(other_nodes), WINDOW_COUNT * PINGS_PER_WINDOW)
+        self.latency_lists = [[] for _ in other_nodes]
+        self.window_statistics = []  # per window, (mean, p50, p99, loss rate) per node
+
+    # run( before_window )
+    #
+    # Purpose: Take every window, calling before_window(i) (if given) at the time window i starts, just before its
+    # first round, so the first round of the window after a link cut samples the network right after the cut.
+    #
+    def run(self, before_window=None):
+        start = self.network.now()
+        for i in range(WINDOW_COUNT):
+            self.network.sleep(start + i * PINGS_PER_WINDOW * TIME_BETWEEN_PINGS - self.network.now())
+            if before_window is not None:
+                before_window(i)
+            first_round = self.samples.rounds
+            for k in range(PINGS_PER_WINDOW):
+                self.network.sleep(start + (i * PINGS_PER_WINDOW + k) * TIME_BETWEEN_PINGS - self.network.now())
+                timestamp = self.network.now()
+                round_start = time.time()
+                results = self.network.probeHosts(self.central_node_input, self.other_nodes, timeout='1')
+                if self.simulation_metrics is not None:
+                    self.simulation_metrics.record("probe_round", time.time() - round_start)
+                self.samples.add(timestamp, results)
+            statistics = self.samples.windowStatistics(first_round, PINGS_PER_WINDOW)
+            self.window_statistics.append(statistics)
+            for n, (mean, p50, p99, loss) in enumerate(statistics):
+                self.latency_lists[n].append(mean)
+
+
+###
+### Runs simulations for one worker process. Switch and host names are prefixed with the worker's namespace, and
+### switch datapath IDs are set explicitly, so networks of different workers never clash.
+###
+class Simulator(object):
+    def __init__(self, workerID, controllers=None):
+        self.switchList = []
+        self.switchIndex = {}
+        self.net = self.createNetwork()
+        self.network_running = False
+        self.topology = None
+        self.adj_matrix = []
+        self.workerID = workerID
+        self.time_to_ready = None
+        self.traffic = None
+        self.metrics = None
+        self.reachability_mismatches = []
+        self.namespace = "w" + str(workerID)
+        self.adj_matrix_new = []
+        self.link_to_cut = None
+        self.probe_engine = None
+        self.samples = []
+        self.cache = None  # topologyCache.TopologyCache of the current output directory
+        self.controllers = controllers if controllers is not None else \
+            controllerPool.ControllerPool(CONTROLLER_IPS, check_health=BACKEND == "mininet")
+
+    # createNetwork()
+    #
+    # Purpose: Return an empty network of the configured BACKEND.
+    #
+    def createNetwork(self):
+        if BACKEND == "analytic":
+            return analyticNet.AnalyticNet()
+        from . import mininetBackend
+        return mininetBackend.SimNet(link=mininetBackend.TCLink)
+
+    # deleteLink( theNodes )
+    #
+    # Purpose:   Retrieve the name of the node, then delete the node.
+    #
+    def deleteLink(self, theNodes):
+        # Assign names
+        n1 = theNodes[0].name
+        name1 = n1.split("-")
+        n2 = theNodes[1].name
+        name2 = n2.split("-")
+        log.debug("Deleted Link: %s %s", name1[0], name2[0])
+        num1 = self.switchIndex[name1[0]]
+        num2 = self.switchIndex[name2[0]]
+        assert (self.adj_matrix_new[num1][num2] == 1)
+        self.adj_matrix_new[num1][num2] = 0
+        self.adj_matrix_new[num2][num1] = 0
+        self.net.configLinkStatus(name1[0], name2[0], 'down')
+
+    # restoreLink( theNodes )
+    #
+    # Purpose: Bring a link removed by deleteLink back up.
+    #
+    def restoreLink(self, theNodes):
+        name1 = theNodes[0].name.split("-")
+        name2 = theNodes[1].name.split("-")
+        log.debug("Restored Link: %s %s", name1[0], name2[0])
+        num1 = self.switchIndex[name1[0]]
+        num2 = self.switchIndex[name2[0]]
+        assert (self.adj_matrix_new[num1][num2] == 0)
+        self.adj_matrix_new[num1][num2] = 1
+        self.adj_matrix_new[num2][num1] = 1
+        self.net.configLinkStatus(name1[0], name2[0], 'up')
+
+    # stopNetwork()
+    #
+    # Purpose: Stop the network of the current simulation if it is still running.
+    #
+    def stopNetwork(self):
+        if self.network_running:
+            self.network_running = False
+            self.net.stop()
+
+    # planExperiments( d, t, s, experiments )
+    #
+    # Purpose: Draw a random central node and link cut (a link number, or None for no cut) for each experiment of
+    # simulation s of file d, shard t, a bridge with probability PARTITION_CUT_RATIO and a link in a loop otherwise.
+    # Returns (central_node_index, cut, expected alarms) per experiment. With a cache, a sample drawn before is kept,
+    # dropped or redrawn according to DUPLICATE_POLICY; a dropped experiment, or one with no new sample after
+    # RESAMPLE_ATTEMPTS draws, is None in the returned list.
+    #
+    def planExperiments(self, d, t, s, experiments):
+        canonical = None
+        if self.cache is not None:
+            canonical = topologyCache.CanonicalTopology(self.topology)
+            self.cache.addTopology(canonical)
+            self.metrics.set("topology_hash", canonical.hash)
+        plan = []
+        duplicates = 0
+        for experiment in range(experiments):
+            location = "%d/%d/%d" % (d + FILE_START_NUMBER, t, experimentIndices(s)[experiment])
+            for attempt in range(RESAMPLE_ATTEMPTS if DUPLICATE_POLICY == "resample" else 1):
+                central_node_index = random.randrange(self.topology.node_count)
+                analysis = graphAnalysis.CutAnalysis(self.topology, central_node_index)
+                cut = None if random.random() < CHANCE_OF_NO_LINK_CUT else \
+                    graphAnalysis.sampleCut(random, analysis, PARTITION_CUT_RATIO)
+                if canonical is None or self.cache.claim(canonical, central_node_index, cut, location) or \
+                        DUPLICATE_POLICY == "keep":
+                    plan.append((central_node_index, cut, analysis.expectedAlarms(cut)))
+                    break
+                duplicates += 1
+            else:
+                plan.append(None)
+        if canonical is not None:
+            self.metrics.set("duplicates", duplicates)
+        return plan
+
+    # detectLinkFaults()
+    #
+    # Purpose: Ping connections between a central node and other nodes in the
+    # network; output the nodes that the central node could not connect to.
+    # All nodes are pinged at once, then the ones that did not answer are retried at once.
+    #
+    def detectLinkFaults(self, network, list_of_nodes, central_node_index):
+        assert (len(list_of_nodes) > 0)
+
+        disconnected_nodes = [0] * len(list_of_nodes)
+        central_node = list_of_nodes[central_node_index]
+
+        unanswered = [i for i in range(0, len(list_of_nodes)) if i != central_node_index]
+        for attempt in range(2):
+            results = network.probeHosts(central_node, [list_of_nodes[i] for i in unanswered], timeout='5')
+            unanswered = [i for i, ping_outputs in zip(unanswered, results) if ping_outputs[1] == 0]
+        for i in unanswered:
+            disconnected_nodes[i] = 1
+
+        if CROSS_CHECK_REACHABILITY:
+            self.crossCheckReachability(disconnected_nodes, central_node_index)
+        return disconnected_nodes
+
+    # crossCheckReachability( disconnected_nodes, central_node_index )
+    #
+    # Purpose: Compare the measured disconnected nodes with the nodes adj_matrix_new leaves
+    # unconnected to the central node, and report the nodes where they differ.
+    #
+    def crossCheckReachability(self, disconnected_nodes, central_node_index):
+        reachable = topology.reachable(self.adj_matrix_new, central_node_index)
+        self.reachability_mismatches = [i for i in range(len(disconnected_nodes))
+                                        if disconnected_nodes[i] != (0 if reachable[i] else 1)]
+        if self.reachability_mismatches:
+            log.warning("Measured reachability differs from adj_matrix_new for node(s): %s",
+                        self.reachability_mismatches)
+        return self.reachability_mismatches
+
+    # waitUntilReady( central_node_index )
+    #
+    # Purpose: Sweep pings from the central node to every other host until READY_STABLE_SWEEPS
+    # sweeps in a row reach all of them, or READY_TIMEOUT seconds pass. Returns the time to
+    # ready in seconds, or None on timeout.
+    #
+    def waitUntilReady(self, central_node_index):
+        central_node = self.net.hosts[central_node_index]
+        other_nodes = [node for j, node in enumerate(self.net.hosts) if j != central_node_index]
+        start = self.net.now()
+        stable = 0
+        while self.net.now() - start < READY_TIMEOUT:
+            sweep_start = self.net.now()
+            results = self.net.probeHosts(central_node, other_nodes, timeout='1', count=3)
+            if all(received > 0 for sent, received, rttmin, rttavg, rttmax, rttdev in results):
+                stable += 1
+                if stable >= READY_STABLE_SWEEPS:
+                    time_to_ready = self.net.now() - start
+                    log.info("Network ready after %.1f s", time_to_ready)
+                    return time_to_ready
+            else:
+                stable = 0
+            self.net.sleep(READY_POLL_INTERVAL - (self.net.now() - sweep_start))
+        log.warning("Network not ready after %d s, measuring anyway", READY_TIMEOUT)
+        return None
+
+    # findPingLatenciesAndCutLink()
+    #
+    # Purpose: Measure the latency from the central node to every other node for
+    # WINDOW_COUNT windows, cutting link_cut (if any) before window LINK_CUT_WINDOW.
+    #
+    def findPingLatenciesAndCutLink(self, network, list_of_nodes, central_node_index, link_cut):
+        assert (len(list_of_nodes) > 0)
+
+        latencyListI = []
+        central_node_i = list_of_nodes[central_node_index]
+        other_nodes = [node for j, node in enumerate(list_of_nodes) if j != central_node_index]
+        engine = ProbeEngine(network, central_node_i, other_nodes, self.metrics)
+
+        def cutLink(window):
+            if link_cut is not None and window == LINK_CUT_WINDOW:
+                self.deleteLink(link_cut)
+
+        engine.run(cutLink)
+        self.probe_engine = engine
+
+        for i in range(WINDOW_COUNT):
+            k = 0
+            for j in range(0, len(list_of_nodes)):
+                if int(j) == int(central_node_index):
+                    latencyListI.append(0)
+                else:
+                    latencyListI.append(engine.latency_lists[k][i])
+                    k += 1
+        return latencyListI
+
+    # printData
+    #
+    # Purpose: Print the entries of a list.
+    #
+    def printData(self, data):
+        assert (len(data) > 0)
+        for i in range(0, len(data)):
+            print(data[i])
+
+    # switchName( i ) / switchDpid( i )
+    #
+    # Purpose: Name and datapath ID of switch i of the current network.
+    #
+    def switchName(self, i):
+        return self.namespace + "s" + str(i)
+
+    def switchDpid(self, i):
+        return "%016x" % (((self.workerID + 1) << 32) | i)
+
+    # simulate( d, t, s, experiments )
+    #
+    # Purpose: Run simulation s of file d, shard t: build one network and measure experiments link cut
+    # experiments on it. Returns one record row per experiment, or None for each if the generated topology was
+    # too small to use. The simulation's metrics are left in self.metrics.
+    #
+    def simulate(self, d, t, s, experiments=1):
+        log.info("Starting Simulation: %d for file %d shard %d", s, d, t)
+        self.metrics = metrics.SimulationMetrics(type="simulation", file=d + FILE_START_NUMBER, shard=t,
+                                                 simulation=s, worker=self.workerID, backend=BACKEND,
+                                                 experiments=experiments)
+        self.samples = [None] * experiments
+
+        with self.metrics.phase("topology"):
+            self.topology = topology.generateTopology(random.randrange(2 ** 32), MIN_NODE, MAX_NODE,
+                                                      MAX_LOOP_SIZE, MAX_BRANCH_SIZE, MAX_LINK_DELAY,
+                                                      MAX_LINK_LOSS)
+        self.metrics.set("seed", self.topology.seed)
+        self.metrics.set("node_count", self.topology.node_count)
+        if self.topology.node_count < 5 or len(self.topology.loopEdges()) < 4:
+            self.metrics.set("skipped", True)
+            return [None] * experiments
+        plan = self.planExperiments(d, t, s, experiments)
+        if all(planned is None for planned in plan):
+            log.info("Every sample of simulation %d is a duplicate, skipping it", s)
+            self.metrics.set("skipped", True)
+            return [None] * experiments
+
+        switch_count = self.topology.node_count
+        controller = self.controllers.acquire(switch_count)
+        try:
+            controller_ip, controller_port = self.controllers.addresses[controller]
+            self.metrics.set("controller", "%s:%d" % (controller_ip, controller_port))
+            with self.metrics.phase("build"):
+                self.net = self.createNetwork()
+                self.network_running = True
+                c0 = self.net.addController(ip=controller_ip, port=controller_port)
+
+                self.switchList = topology.instantiate(self.topology, self.net, self.switchName, self.switchDpid,
+                                                       protocols="OpenFlow13")
+                self.switchIndex = dict((sw.name, i) for i, sw in enumerate(self.switchList))
+                self.adj_matrix = self.topology.adjacencyMatrix()
+                self.adj_matrix_new = copy.deepcopy(self.adj_matrix)
+
+                switches = self.net.switches
+                for i, switch in enumerate(switches):
+                    host = self.net.addHost(self.namespace + "h" + str(i))
+                    self.net.addLink(host, switch)
+                self.net.build()
+                c0.start()
+                for switch in switches:
+                    switch.start([c0])
+
+            rows = []
+            link_to_cut = None
+            warmed_up = False
+            for experiment, planned in enumerate(plan):
+                if planned is None:
+                    rows.append(None)
+                    continue
+                central_node_index, cut, expected_alarms = planned
+                if not warmed_up:
+                    warmed_up = True
+                    with self.metrics.phase("warm_up"):
+                        self.time_to_ready = self.waitUntilReady(central_node_index)
+                    self.metrics.set("time_to_ready", self.time_to_ready)
+                    self.controllers.observe(controller, switch_count,
+                                             self.time_to_ready if self.time_to_ready is not None else READY_TIMEOUT)
+                else:
+                    with self.metrics.phase("reconverge"):
+                        if link_to_cut is not None:
+                            self.restoreLink(link_to_cut)
+                        self.time_to_ready = self.waitUntilReady(central_node_index)
+                    if self.time_to_ready is not None:
+                        self.metrics.record("time_to_reconverge", self.time_to_ready)
+                rows.append(self.runExperiment(central_node_index, cut, expected_alarms))
+                if OUTPUT_SAMPLES:
+                    self.samples[experiment] = self.probe_engine.samples
+                link_to_cut = self.link_to_cut
+        finally:
+            try:
+                with self.metrics.phase("net_stop"):
+                    self.stopNetwork()
+            finally:
+                self.controllers.release(controller, switch_count)
+        return rows
+
+    # runExperiment( central_node_index, cut, expected_alarms )
+    #
+    # Purpose: Measure one experiment from the central node on the running network, with its own traffic, cutting
+    # link number cut of the topology unless it is None. Returns the record row, whose alarms are expected_alarms
+    # if PREDICT_ALARMS is set; the link cut, if any, is left in self.link_to_cut and stays down.
+    #
+    def runExperiment(self, central_node_index, cut, expected_alarms):
+        schedule = traffic.trafficSchedule(random.randrange(2 ** 32), len(self.net.hosts),
+                                           WINDOW_COUNT * PINGS_PER_WINDOW * TIME_BETWEEN_PINGS, TRAFFIC_LEVEL,
+                                           MAX_TRAFFIC_DURATION)
+        self.traffic = self.net.startTraffic(schedule, IPERF_PORT, MAX_TRAFFIC_DURATION)
+        if cut is None:
+            self.link_to_cut = None
+        else:
+            self.link_to_cut = [self.switchList[self.topology.src[cut]], self.switchList[self.topology.dst[cut]]]
+        # The traffic is stopped even if measuring fails, so no iperf process outlives the experiment
+        try:
+            with self.metrics.phase("measurement"):
+                latency_list = self.findPingLatenciesAndCutLink(self.net, self.net.hosts, central_node_index,
+                                                                self.link_to_cut)
+            if PREDICT_ALARMS:
+                disconnected_nodes = expected_alarms
+            else:
+                with self.metrics.phase("detect_link_faults"):
+                    disconnected_nodes = self.detectLinkFaults(self.net, self.net.hosts, central_node_index)
+        finally:
+            with self.metrics.phase("traffic_stop"):
+                self.traffic.stop()
+        log.debug("The central node was unable to connect to the following node(s): %s", disconnected_nodes)
+        for statistics in self.probe_engine.window_statistics:
+            self.metrics.extend("probe_loss", [loss for mean, p50, p99, loss in statistics])
+        self.metrics.record("link_cut", 1 if self.link_to_cut is not None else 0)
+        self.metrics.record("partitioning_cut", 1 if any(expected_alarms) else 0)
+        self.metrics.record("alarms", sum(disconnected_nodes))
+        self.metrics.record("reachability_mismatches", len(self.reachability_mismatches))
+        self.metrics.record("flows_offered", self.traffic.offered)
+        self.metrics.record("flows_achieved", self.traffic.achieved)
+        self.metrics.extend("dispatch_lag", self.traffic.dispatch_lags)
+
+        return dataFormat.csvRow(self.topology.node_count, central_node_index, disconnected_nodes,
+                                 latency_list, self.adj_matrix, self.adj_matrix_new)
+
+
+def shardName(d, t):
+    return "dataWLatency" + str(d + FILE_START_NUMBER) + "t" + str(t)
+
+
+# experimentIndices( s )
+#
+# Purpose: Indices, within its shard, of the records measured by simulation s. Every simulation measures
+# EXPERIMENTS_PER_NETWORK records except the last one of a shard, which measures what is left.
+#
+def experimentIndices(s):
+    return range(s * EXPERIMENTS_PER_NETWORK, min((s + 1) * EXPERIMENTS_PER_NETWORK, SIMULATIONS_PER_FILE))
+
+
+def simulationCount():
+    return -(-SIMULATIONS_PER_FILE // EXPERIMENTS_PER_NETWORK)
+
+
+# shardFileName( d, t )
+#
+# Purpose: File name of file d, shard t in the configured OUTPUT_FORMAT.
+#
+def shardFileName(d, t):
+    return shardName(d, t) + (dataFormat.EXTENSION if OUTPUT_FORMAT == "nsd" else ".csv")
+
+
+# pointSettings( values )
+#
+# Purpose: Every parameter of this module, as changed by the {parameter: value} dict of a sweep point.
+#
+def pointSettings(values):
+    settings = dict(globals())
+    settings.update(values)
+    return settings
+
+
+def shardParameters(values=None):
+    settings = pointSettings(values or {})
+    parameters = dict((name, settings[name]) for name in dataFormat.FILE_PARAMETERS[1:])
+    for name in ["MAX_LINK_DELAY", "MAX_LINK_LOSS", "TRAFFIC_LEVEL", "CHANCE_OF_NO_LINK_CUT"]:
+        parameters[name] = settings[name]
+    parameters.update(values or {})
+    return parameters
+
+
+# closeShard( d, t, shard, directory, values )
+#
+# Purpose: Finish the StreamingShard of file d, shard t and add it to the shard's metrics file. A CSV shard of a sweep
+# point gets a <shard>.point.json next to it with the parameters an .nsd header would carry, since its own header
+# only holds the file wide variables. It is written before the shard is finished so a complete shard is never untagged.
+#
+def closeShard(d, t, shard, directory=".", values=None):
+    if values and not shard.binary:
+        with open(os.path.join(directory, shardName(d, t) + ".point.json"), "w") as f:
+            json.dump(shard.parameters, f, indent=1, sort_keys=True)
+    shard.close()
+    log.info("wrote to %s", shard.file_name)
+    metrics.appendMetrics(os.path.join(directory, shardName(d, t) + ".metrics.jsonl"),
+                          {"type": "shard", "file": d + FILE_START_NUMBER, "shard": t, "records": shard.record_count})
+
+
+# simulationWorker( workerID, tasks, connection, points, controllers, settings )
+#
+# Purpose: Run the (p, d, t, s) simulations taken from the tasks queue until a None task arrives, each with the
+# parameters of sweep point p and a controller from the shared ControllerPool, sending ((p, d, t, s), rows,
+# metrics summary, probe samples) back over connection for each one. A simulation that raises an error has its
+# network stopped and is sent back with rows None and the error in the summary. settings overrides this module's
+# parameters for the whole run; it is applied here because a worker started with spawn or forkserver imports the
+# module afresh.
+#
+def simulationWorker(workerID, tasks, connection, points, controllers, settings):
+    globals().update(settings)
+    defaults = dict((name, globals()[name]) for name in sweep.SWEEP_PARAMETERS)
+    simulator = Simulator(workerID, controllers)
+    caches = {}
+    for p, d, t, s in iter(tasks.get, None):
+        globals().update(defaults)
+        globals().update(points[p][0])
+        if TOPOLOGY_CACHE is not None and p not in caches:
+            caches[p] = topologyCache.TopologyCache(os.path.join(points[p][1], TOPOLOGY_CACHE))
+        simulator.cache = caches.get(p)
+        simulator.metrics = None
+        try:
+            rows = simulator.simulate(d, t, s, len(experimentIndices(s)))
+        except Exception as error:
+            log.exception("Simulation %d for file %d shard %d failed", s, d, t)
+            try:
+                simulator.stopNetwork()
+            except Exception:
+                log.exception("Could not stop the network of the failed simulation")
+            summary = simulator.metrics.summary() if simulator.metrics is not None else {"phases": {}}
+            summary["error"] = repr(error)
+            connection.send(((p, d, t, s), None, summary, None))
+            continue
+        connection.send(((p, d, t, s), rows, simulator.metrics.summary(), simulator.samples))
+    connection.close()
+
+
+# runWorkerPool( worker_count, points, settings )
+#
+# Purpose: Run the simulations of every shard of every file whose records are not saved yet on worker_count
+# processes, saving the records as they come back and closing each file once all SIMULATIONS_PER_FILE records are in.
+# points is a list of ({parameter: value}, directory) sweep points, see sweep.py; every point writes all of its files
+# to its directory. By default there is one point, this module's parameters, writing to the current directory.
+# settings is a {parameter: value} dict overriding this module's parameters for the whole run, in every process.
+#
+def runWorkerPool(worker_count=WORKER_COUNT, points=None, settings=None):
+    if points is None:
+        points = [({}, ".")]
+    settings = dict(settings or {})
+    globals().update(settings)
+    work = []
+    pending = set()  # (p, d, t) of every shard with simulations left to run
+    for p, (values, directory) in enumerate(points):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        point_settings = pointSettings(values)
+        for d in range(FILES):
+            for t in range(SHARD_COUNT):
+                file_name = os.path.join(directory, shardFileName(d, t))
+                if shardJournal.isComplete(file_name):
+                    log.info("%s is already complete, skipping it", file_name)
+                    continue
+                completed = shardJournal.completedSimulations(file_name, shardParameters(values))
+                if completed:
+                    log.info("resuming %s, %d of %d records done", file_name, len(completed), SIMULATIONS_PER_FILE)
+                remaining = [s for s in range(simulationCount()) if not completed.issuperset(experimentIndices(s))]
+                if not remaining:
+                    closeShard(d, t, shardJournal.StreamingShard(file_name, shardParameters(values)), directory, values)
+                    continue
+                pending.add((p, d, t))
+                for s in remaining:
+                    work.append((sweep.estimateCost(point_settings, len(experimentIndices(s))), p, d, t, s))
+
+    # Longest simulations first: each worker takes the next task as soon as it is free, which makes this LPT
+    # scheduling across the whole sweep
+    work.sort(key=lambda task: -task[0])
+    if work:
+        log.info("%d simulations, predicted makespan %.1f h on %d workers", len(work),
+                 sweep.lptSchedule([task[0] for task in work], worker_count)[1] / 3600.0, worker_count)
+    tasks = multiprocessing.Queue()
+    for cost, p, d, t, s in work:
+        tasks.put((p, d, t, s))
+    # Failed simulations go back on the queue, so the workers are only told to stop once nothing is outstanding
+    outstanding = len(work)
+    attempts = {}
+    if not outstanding:
+        for _ in range(worker_count):
+            tasks.put(None)
+
+    controllers = controllerPool.ControllerPool(CONTROLLER_IPS, check_health=BACKEND == "mininet")
+    workers = []
+    connections = []
+    for workerID in range(worker_count):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        worker = multiprocessing.Process(target=simulationWorker,
+                                         args=(workerID, tasks, sender, points, controllers, settings))
+        worker.start()
+        sender.close()
+        workers.append(worker)
+        connections.append(receiver)
+
+    # Shards are opened when their first record arrives and closed once complete, so only the shards in progress
+    # hold open files
+    shards = {}
+    while connections:
+        for connection in multiprocessing.connection.wait(connections):
+            try:
+                (p, d, t, s), rows, summary, samples = connection.recv()
+            except EOFError:
+                connections.remove(connection)
+                if outstanding:
+                    # Workers only stop on their own once nothing is outstanding: this one died inside a
+                    # simulation, which is lost and leaves its shard incomplete
+                    log.error("a worker stopped unexpectedly")
+                    outstanding -= 1
+                    if not outstanding:
+                        for _ in range(worker_count):
+                            tasks.put(None)
+                continue
+            values, directory = points[p]
+            prefix = os.path.join(directory, shardName(d, t))
+            if values:
+                summary["point"] = values
+            if rows is None:
+                attempts[(p, d, t, s)] = attempts.get((p, d, t, s), 0) + 1
+                metrics.appendMetrics(prefix + ".metrics.jsonl", summary)
+                if attempts[(p, d, t, s)] < SIMULATION_ATTEMPTS:
+                    log.warning("simulation %d of %s failed with %s, running it again", s, prefix, summary["error"])
+                    tasks.put((p, d, t, s))
+                    continue
+                log.error("simulation %d of %s failed %d times, last with %s; run again to retry it", s, prefix,
+                          attempts[(p, d, t, s)], summary["error"])
+            else:
+                start = time.time()
+                if (p, d, t) not in shards:
+                    shards[(p, d, t)] = shardJournal.StreamingShard(os.path.join(directory, shardFileName(d, t)),
+                                                                    shardParameters(values))
+                shard = shards[(p, d, t)]
+                for index, row, buffer in zip(experimentIndices(s), rows, samples):
+                    if index not in shard.completed:
+                        if row is not None and buffer is not None:
+                            probeSamples.appendSamples(prefix + ".samples", shard.record_count, buffer)
+                        shard.add(index, row)
+                summary["phases"]["write"] = time.time() - start
+                metrics.appendMetrics(prefix + ".metrics.jsonl", summary)
+                if len(shard.completed) == SIMULATIONS_PER_FILE:
+                    closeShard(d, t, shard, directory, values)
+                    del shards[(p, d, t)]
+                    pending.discard((p, d, t))
+            outstanding -= 1
+            if not outstanding:
+                for _ in range(worker_count):
+                    tasks.put(None)
+
+    for worker in workers:
+        worker.join()
+    for line in controllers.summary():
+        log.info("controller %s", line)
+    if TOPOLOGY_CACHE is not None:
+        for values, directory in points:
+            cache = topologyCache.TopologyCache(os.path.join(directory, TOPOLOGY_CACHE))
+            report = cache.report()
+            cache.close()
+            log.info("%s: %d samples of %d topologies (%d structures, %.1f effective), %d duplicate draws",
+                     cache.file_name, report["samples"], report["topologies"], report["structures"],
+                     report["effective_topologies"], report["duplicate_draws"])
+    for p, d, t in sorted(pending):
+        log.warning("%s is incomplete; run again to resume it",
+                    os.path.join(points[p][1], shardFileName(d, t)))
+        if (p, d, t) in shards:
+            shards[(p, d, t)].detach()
+
+
+# cleanUp()
+#
+# Purpose: Remove what Mininet left behind (switches, links, namespaces) after a run on the Mininet backend.
+#
+def cleanUp():
+    if BACKEND == "mininet":
+        os.system("sudo mn -c")
+
+
+# addSettingArguments( parser )
+#
+# Purpose: Add the --workers, --backend, --format and --set options shared by the generate and sweep commands.
+#
+def addSettingArguments(parser):
+    parser.add_argument("--workers", type=int, default=WORKER_COUNT)
+    parser.add_argument("--backend", choices=["mininet", "analytic"], default=BACKEND)
+    parser.add_argument("--format", choices=["csv", "nsd"], default=OUTPUT_FORMAT)
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a parameter, VALUE being a Python literal, e.g. --set MAX_NODE=150")
+
+
+# parseSettings( parser, args )
+#
+# Purpose: Return the parameter overrides given by the options of addSettingArguments() and apply them to this
+# module. Pass the result to runWorkerPool() so the workers get them too.
+#
+def parseSettings(parser, args):
+    settings = {"BACKEND": args.backend, "OUTPUT_FORMAT": args.format}
+    for assignment in args.set:
+        name, _, value = assignment.partition("=")
+        if not name.isupper() or name not in globals():
+            parser.error("unknown parameter " + name)
+        try:
+            settings[name] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            settings[name] = value
+    globals().update(settings)
+    return settings
+
+
+# main( argv )
+#
+# Purpose: Generate data in the current directory, the netsim generate command. --set NAME=VALUE overrides any
+# parameter of this module for the run.
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate random networks and write their records")
+    addSettingArguments(parser)
+    args = parser.parse_args(argv)
+    settings = parseSettings(parser, args)
+
+    logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    runWorkerPool(args.workers, settings=settings)
+    cleanUp()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Parameter sweeps for simulator.py.
+
+A sweep grid is a JSON object mapping simulator.py parameters to the values to try, for example
+    {"MAX_NODE": [50, 75, 150], "WINDOW_COUNT": [5, 10], "TRAFFIC_LEVEL": [0.05, 0.2]}
+Every combination of values is one point. Each point gets its own directory (<output>/point<k>) holding a point.json
+with its values and the usual dataWLatency files. An .nsd file carries the point's parameters in its header; a CSV
+file, whose header only holds the file wide variables, gets them in a dataWLatency{d}t{t}.point.json next to it.
+
+estimateCost() predicts how long one simulation of a point takes from its settings. simulator.runWorkerPool() puts
+the simulations of every point on the task queue longest first, so each worker that frees up takes the longest
+simulation left: longest processing time first (LPT) scheduling, which keeps the sweep's makespan within 4/3 of
+the best possible. lptSchedule() predicts that makespan.
+
+Usage:
+    python -m netsim sweep grid.json [--output sweep] [--dry-run] [--workers N] [--backend analytic]
+                                     [--format nsd] [--set NAME=VALUE ...]
+
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import logging
+import os
+
+# Parameters a sweep may vary. They change how each simulation runs but not how records are counted and stored.
+SWEEP_PARAMETERS = ["MIN_NODE",
+                    "MAX_NODE",
+                    "MAX_LOOP_SIZE",
+                    "MAX_BRANCH_SIZE",
+                    "TIME_BETWEEN_PINGS",
+                    "PINGS_PER_WINDOW",
+                    "WINDOW_COUNT",
+                    "LINK_CUT_WINDOW",
+                    "MAX_TRAFFIC_DURATION",
+                    "MAX_LINK_DELAY",
+                    "MAX_LINK_LOSS",
+                    "TRAFFIC_LEVEL",
+                    "CHANCE_OF_NO_LINK_CUT",
+                    "PARTITION_CUT_RATIO"]
+
+# Seconds. Rough estimates set by hand, not fitted; the build, net_stop and measurement phases recorded in
+# .metrics.jsonl files show how far they are from a machine's real times.
+BUILD_SECONDS_PER_SWITCH = 0.5
+STOP_SECONDS_PER_SWITCH = 0.2
+DETECT_SECONDS = 10.0
+ANALYTIC_SECONDS_PER_PROBE = 2e-5  # per probed node per round, per node of the network
+
+
+# gridPoints( grid )
+#
+# Purpose: Return every combination of the values in grid as a list of {parameter: value} dicts.
+#
+def gridPoints(grid):
+    unknown = sorted(set(grid) - set(SWEEP_PARAMETERS))
+    if unknown:
+        raise ValueError("cannot sweep " + ", ".join(unknown) + "; sweepable: " + ", ".join(SWEEP_PARAMETERS))
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[name] for name in names])]
+
+
+def meanNodeCount(settings):
+    return (settings["MIN_NODE"] + settings["MAX_LOOP_SIZE"] + settings["MAX_NODE"]) / 2.0
+
+
+# estimateCost( settings, experiments )
+#
+# Purpose: Predicted seconds for one simulation measuring experiments records, settings holding every simulator.py
+# parameter.
+#
+def estimateCost(settings, experiments=1):
+    nodes = meanNodeCount(settings)
+    rounds = settings["WINDOW_COUNT"] * settings["PINGS_PER_WINDOW"]
+    if settings["BACKEND"] == "analytic":
+        return experiments * rounds * nodes * nodes * ANALYTIC_SECONDS_PER_PROBE
+    per_experiment = (settings["READY_STABLE_SWEEPS"] * settings["READY_POLL_INTERVAL"] +
+                      rounds * settings["TIME_BETWEEN_PINGS"] +
+                      DETECT_SECONDS +
+                      settings["MAX_TRAFFIC_DURATION"])
+    return nodes * (BUILD_SECONDS_PER_SWITCH + STOP_SECONDS_PER_SWITCH) + experiments * per_experiment
+
+
+# lptSchedule( costs, worker_count )
+#
+# Purpose: Assign items to workers longest first, each to the least loaded worker. Returns the list of item numbers
+# of each worker and the makespan.
+#
+def lptSchedule(costs, worker_count):
+    workers = [(0.0, w) for w in range(worker_count)]
+    assignments = [[] for _ in range(worker_count)]
+    for item in sorted(range(len(costs)), key=lambda k: -costs[k]):
+        load, w = heapq.heappop(workers)
+        assignments[w].append(item)
+        heapq.heappush(workers, (load + costs[item], w))
+    return assignments, max(load for load, w in workers) if workers else 0.0
+
+
+def pointDirectory(output, k):
+    return os.path.join(output, "point%03d" % k)
+
+
+# writePoint( directory, values )
+#
+# Purpose: Create a point's directory and its point.json.
+#
+def writePoint(directory, values):
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(os.path.join(directory, "point.json"), "w") as f:
+        json.dump(values, f, indent=1, sort_keys=True)
+
+
+# main( argv )
+#
+# Purpose: Run or plan a sweep, the netsim sweep command.
+#
+def main(argv=None):
+    from . import simulator
+
+    parser = argparse.ArgumentParser(description="Run the simulator over a grid of parameters")
+    parser.add_argument("grid", help="JSON file mapping parameters to lists of values")
+    parser.add_argument("--output", default="sweep")
+    parser.add_argument("--dry-run", action="store_true", help="only print the points and the predicted makespan")
+    simulator.addSettingArguments(parser)
+    args = parser.parse_args(argv)
+    settings = simulator.parseSettings(parser, args)
+
+    with open(args.grid) as f:
+        values = gridPoints(json.load(f))
+    points = [(point, pointDirectory(args.output, k)) for k, point in enumerate(values)]
+    costs = []
+    for point, directory in points:
+        cost = estimateCost(simulator.pointSettings(point))
+        print("%s %s %.0f s per simulation" % (directory, json.dumps(point, sort_keys=True), cost))
+        costs.extend([cost] * simulator.simulationCount() * simulator.FILES * simulator.SHARD_COUNT)
+    print("%d simulations, predicted makespan %.1f h on %d workers" % (len(costs),
+                                                                      lptSchedule(costs, args.workers)[1] / 3600.0,
+                                                                      args.workers))
+    if not args.dry_run:
+        logging.basicConfig(level=simulator.LOG_LEVEL,
+                            format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+        for point, directory in points:
+            writePoint(directory, point)
+        simulator.runWorkerPool(args.workers, points, settings)
+        simulator.cleanUp()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Export simulator.py data as padded, fixed size batches for training.
+
+Records are streamed from any mix of CSV files and shards and grouped by node_count into buckets of BUCKET_STEP
+nodes (25 nodes go to the 32 node bucket, 75 to the 80 node bucket, ...), so padding stays under BUCKET_STEP nodes
+per record. Every BATCH_SIZE records of a bucket become one batch, written as .npy files that numpy.load(...,
+mmap_mode="r") maps without copying (readNpy() does the same without numpy):
+
+    <output>/b<bucket>/<batch>.node_count.npy      int32   [B]
+    <output>/b<bucket>/<batch>.central.npy         int32   [B]       central_node_index
+    <output>/b<bucket>/<batch>.node_mask.npy       int8    [B, N]    1 for real nodes, 0 for padding
+    <output>/b<bucket>/<batch>.alarms.npy          int8    [B, N]
+    <output>/b<bucket>/<batch>.latencies.npy       float32 [B, WINDOW_COUNT, N]
+    <output>/b<bucket>/<batch>.edge_index.npy      int32   [B, 2, E]  COO links of adj_matrix, both directions
+    <output>/b<bucket>/<batch>.edge_mask.npy       int8    [B, E]    1 for real links, 0 for padding
+    <output>/b<bucket>/<batch>.failure_mask.npy    int8    [B, E]    edge_mask without the removed link
+    <output>/b<bucket>/<batch>.removed_link.npy    int32   [B, 2]    (-1, -1) if no link was cut
+
+N is the bucket size and E the most links of any record of the batch. The last batch of a bucket can hold fewer
+than BATCH_SIZE records. <output>/manifest.json lists every batch with its bucket, record count and shapes.
+
+Usage:
+    python -m netsim export --output tensors [--batch-size 256] [--bucket-step 16] [files ...]
+
+"""
+
+import argparse
+import array
+import ast
+import json
+import mmap
+import os
+import sys
+
+from . import dataDecoder
+from . import dataFormat
+
+BATCH_SIZE = 256
+BUCKET_STEP = 16
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+_ENDIAN = "<" if sys.byteorder == "little" else ">"
+_DESCR = {"f": "f4", "i": "i4", "b": "i1"}
+
+
+# writeNpy( file_name, values, shape )
+#
+# Purpose: Write a flat array.array ('f', 'i' or 'b') as a C ordered .npy file of the given shape.
+#
+def writeNpy(file_name, values, shape):
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': %r, }" % (_ENDIAN + _DESCR[values.typecode],
+                                                                        tuple(shape))
+    header += " " * (-(len(NPY_MAGIC) + 2 + len(header) + 1) % 64) + "\n"
+    with open(file_name, "wb") as f:
+        f.write(NPY_MAGIC)
+        f.write(len(header).to_bytes(2, "little"))
+        f.write(header.encode("latin1"))
+        f.write(values.tobytes())
+
+
+# readNpy( file_name )
+#
+# Purpose: Map a .npy file written by writeNpy() and return a memoryview of its values shaped like the array,
+# without copying them. The file must be in this machine's byte order.
+#
+def readNpy(file_name):
+    with open(file_name, "rb") as f:
+        if f.read(len(NPY_MAGIC)) != NPY_MAGIC:
+            raise ValueError(file_name + " is not a version 1.0 .npy file")
+        header = ast.literal_eval(f.read(int.from_bytes(f.read(2), "little")).decode("latin1"))
+        data_start = f.tell()
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    descr = header["descr"]
+    if descr[0] != _ENDIAN:
+        raise ValueError(file_name + " is not in this machine's byte order")
+    typecode = dict((v, k) for k, v in _DESCR.items())[descr[1:]]
+    view = memoryview(mapped)[data_start:]
+    shape = header["shape"]
+    if 0 in shape:
+        return view.cast("B").cast(typecode)
+    return view.cast("B").cast(typecode, shape)
+
+
+def bucketSize(node_count, bucket_step=BUCKET_STEP):
+    return -(-node_count // bucket_step) * bucket_step
+
+
+# recordSample( record )
+#
+# Purpose: Turn a dataDecoder.Record into the (node_count, central_node_index, alarm_list, latencies, edges,
+# removed_link) tuple a dataFormat.ShardReader yields.
+#
+def recordSample(record):
+    latencies = []
+    for window in record.latency_matrix_before_link_cut + record.latency_matrix_after_link_cut:
+        latencies.extend(window)
+    edges = []
+    for i, row in enumerate(record.adj_matrix):
+        edges.extend((i, j) for j in range(i + 1, len(row)) if row[j])
+    return (record.node_count, record.central_node_index, record.alarm_list, latencies, edges,
+            record.removed_link)
+
+
+# fileSamples( file_name )
+#
+# Purpose: Yield the samples of a CSV file or shard, straight from the ShardReader for shards.
+#
+def fileSamples(file_name):
+    if file_name.endswith(dataFormat.EXTENSION):
+        return iter(dataFormat.ShardReader(file_name))
+    return (recordSample(record) for record in dataDecoder.decodeCsv(file_name))
+
+
+###
+### Collects the samples of one bucket and writes them out BATCH_SIZE at a time.
+###
+class BucketBatcher(object):
+    def __init__(self, directory, bucket, batch_size, window_count):
+        self.directory = directory
+        self.bucket = bucket
+        self.batch_size = batch_size
+        self.window_count = window_count
+        self.samples = []
+        self.batches = []
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def add(self, sample):
+        self.samples.append(sample)
+        if len(self.samples) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.samples:
+            return
+        samples = self.samples
+        count = len(samples)
+        n_max = self.bucket
+        e_max = max(2 * len(sample[4]) for sample in samples)
+        columns = dict(node_count=array.array("i"),
+                       central=array.array("i"),
+                       node_mask=array.array("b", bytes(count * n_max)),
+                       alarms=array.array("b", bytes(count * n_max)),
+                       latencies=array.array("f", bytes(4 * count * self.window_count * n_max)),
+                       edge_index=array.array("i", bytes(4 * count * 2 * e_max)),
+                       edge_mask=array.array("b", bytes(count * e_max)),
+                       failure_mask=array.array("b", bytes(count * e_max)),
+                       removed_link=array.array("i"))
+        for b, (n, central, alarm_list, latencies, edges, removed_link) in enumerate(samples):
+            columns["node_count"].append(n)
+            columns["central"].append(central)
+            base = b * n_max
+            columns["node_mask"][base:base + n] = array.array("b", [1] * n)
+            columns["alarms"][base:base + n] = array.array("b", alarm_list)
+            for w in range(self.window_count):
+                start = (b * self.window_count + w) * n_max
+                columns["latencies"][start:start + n] = array.array("f", latencies[w * n:(w + 1) * n])
+            sources = array.array("i")
+            targets = array.array("i")
+            failure = array.array("b")
+            for i, j in edges:
+                up = 0 if removed_link is not None and (i, j) == tuple(removed_link) else 1
+                sources.extend((i, j))
+                targets.extend((j, i))
+                failure.extend((up, up))
+            e = len(sources)
+            start = b * 2 * e_max
+            columns["edge_index"][start:start + e] = sources
+            columns["edge_index"][start + e_max:start + e_max + e] = targets
+            columns["edge_mask"][b * e_max:b * e_max + e] = array.array("b", [1] * e)
+            columns["failure_mask"][b * e_max:b * e_max + e] = failure
+            columns["removed_link"].extend(removed_link if removed_link is not None else (-1, -1))
+
+        shapes = dict(node_count=[count], central=[count], node_mask=[count, n_max], alarms=[count, n_max],
+                      latencies=[count, self.window_count, n_max], edge_index=[count, 2, e_max],
+                      edge_mask=[count, e_max], failure_mask=[count, e_max], removed_link=[count, 2])
+        name = "%06d" % len(self.batches)
+        for column, values in columns.items():
+            writeNpy(os.path.join(self.directory, name + "." + column + ".npy"), values, shapes[column])
+        self.batches.append({"bucket": self.bucket,
+                             "batch": os.path.join(os.path.basename(self.directory), name),
+                             "records": count,
+                             "shapes": shapes})
+        self.samples = []
+
+
+# exportTensors( file_names, output, batch_size, bucket_step )
+#
+# Purpose: Stream the records of file_names into bucketed batches under output and write its manifest.json.
+# The files must share WINDOW_COUNT. Returns the manifest.
+#
+def exportTensors(file_names, output, batch_size=BATCH_SIZE, bucket_step=BUCKET_STEP):
+    window_count = None
+    batchers = {}
+    for file_name in file_names:
+        file_window_count = int(dataDecoder.readHeader(file_name)["WINDOW_COUNT"])
+        if window_count is None:
+            window_count = file_window_count
+        elif file_window_count != window_count:
+            raise ValueError(file_name + " does not share the WINDOW_COUNT of " + file_names[0])
+        for sample in fileSamples(file_name):
+            bucket = bucketSize(sample[0], bucket_step)
+            if bucket not in batchers:
+                batchers[bucket] = BucketBatcher(os.path.join(output, "b" + str(bucket)), bucket, batch_size,
+                                                 window_count)
+            batchers[bucket].add(sample)
+
+    manifest = {"window_count": window_count, "batch_size": batch_size, "bucket_step": bucket_step, "batches": []}
+    for bucket in sorted(batchers):
+        batchers[bucket].flush()
+        manifest["batches"].extend(batchers[bucket].batches)
+    if not os.path.isdir(output):
+        os.makedirs(output)
+    with open(os.path.join(output, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+# main( argv )
+#
+# Purpose: Export files as batches, the netsim export command.
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export simulator.py data as padded .npy batches")
+    parser.add_argument("files", nargs="*", help="files to export, by default every dataWLatency file in --directory")
+    parser.add_argument("--directory", default=".")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--bucket-step", type=int, default=BUCKET_STEP)
+    args = parser.parse_args(argv)
+
+    manifest = exportTensors(args.files or dataDecoder.findShards(args.directory), args.output, args.batch_size,
+                             args.bucket_step)
+    print("wrote %d records in %d batches to %s" % (sum(batch["records"] for batch in manifest["batches"]),
+                                                   len(manifest["batches"]), args.output))
+
+
+if __name__ == "__main__":
+    main()
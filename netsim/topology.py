@@ -0,0 +1,178 @@
+"""
+Random switch topologies for simulator.py, generated without Mininet.
+
+generateTopology() grows a network the same way the simulator always has: starting from switch 0, it keeps adding
+either a branch (a random tree hanging off the newest switch) or a loop (a ring of 3 to max_loop_size new switches
+through the newest switch) until the network is within max_loop_size switches of a random total size. Every link
+gets random bw, delay, loss, max_queue_size and use_htb options.
+
+The generator is iterative, uses its own random.Random(seed) and shares no state, so the same seed always gives the
+same topology and any number of topologies can be generated at once. The result is a Topology of flat arrays, one
+entry per link; instantiate() adds it to a Mininet (or analyticNet) network.
+
+"""
+
+import array
+import collections
+import random
+
+MIN_NODE = 10
+MAX_NODE = 75
+MAX_LOOP_SIZE = 15
+MAX_BRANCH_SIZE = 15
+MAX_LINK_DELAY = 5  # ms
+MAX_LINK_LOSS = 1
+
+
+###
+### Links of a generated network. Link k joins switch src[k] and switch dst[k] with the options in bw[k],
+### delay[k] (ms), loss[k] (%), max_queue_size[k] and use_htb[k]. loop[k] is the number of the loop the link
+### belongs to, or -1 for branch links.
+###
+class Topology(object):
+    def __init__(self, seed):
+        self.seed = seed
+        self.node_count = 1
+        self.loop_count = 0
+        self.src = array.array("i")
+        self.dst = array.array("i")
+        self.bw = array.array("i")
+        self.delay = array.array("i")
+        self.loss = array.array("i")
+        self.max_queue_size = array.array("i")
+        self.use_htb = array.array("b")
+        self.loop = array.array("i")
+
+    def edgeCount(self):
+        return len(self.src)
+
+    def edges(self):
+        return list(zip(self.src, self.dst))
+
+    # loopEdges()
+    #
+    # Purpose: Return the numbers of the links that belong to loops, the links that can be cut.
+    #
+    def loopEdges(self):
+        return [k for k in range(len(self.loop)) if self.loop[k] >= 0]
+
+    # linkOptions( k )
+    #
+    # Purpose: Return the TCLink options of link k.
+    #
+    def linkOptions(self, k):
+        return dict(bw=self.bw[k],
+                    delay=str(self.delay[k]) + 'ms',
+                    loss=self.loss[k],
+                    max_queue_size=self.max_queue_size[k],
+                    use_htb=bool(self.use_htb[k]))
+
+    def adjacencyMatrix(self):
+        adj_matrix = [[0] * self.node_count for _ in range(self.node_count)]
+        for i, j in zip(self.src, self.dst):
+            adj_matrix[i][j] = 1
+            adj_matrix[j][i] = 1
+        return adj_matrix
+
+    def _addLink(self, rng, node1, node2, loop, max_link_delay, max_link_loss):
+        bw_i = rng.randint(1, 1000)
+        self.src.append(node1)
+        self.dst.append(node2)
+        self.bw.append(bw_i)
+        self.delay.append(rng.randint(1, max_link_delay))
+        self.loss.append(rng.randint(0, max_link_loss))
+        self.max_queue_size.append(rng.randint(100, 10000) + bw_i)
+        self.use_htb.append(rng.choice([True, False]))
+        self.loop.append(loop)
+
+
+# generateTopology( seed, ... )
+#
+# Purpose: Generate a random network of loops and branches. A seed of None picks a random one, which is kept in
+# the result's seed.
+#
+def generateTopology(seed=None, min_node=MIN_NODE, max_node=MAX_NODE, max_loop_size=MAX_LOOP_SIZE,
+                     max_branch_size=MAX_BRANCH_SIZE, max_link_delay=MAX_LINK_DELAY, max_link_loss=MAX_LINK_LOSS):
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    rng = random.Random(seed)
+    topology = Topology(seed)
+    total_size = rng.randint(min_node + max_loop_size, max_node)
+    while topology.node_count - 1 < total_size - max_loop_size:
+        newest = topology.node_count - 1
+        next_network = rng.randint(0, 1)
+        if next_network == 1 or newest < 4:
+            _addBranches(topology, rng, newest, max_branch_size, max_link_delay, max_link_loss)
+        else:
+            _addLoop(topology, rng, newest, max_loop_size, max_link_delay, max_link_loss)
+    return topology
+
+
+# _addBranches( topology, rng, root, ... )
+#
+# Purpose: Grow a random tree from root, depth first. Each switch gets randint(1, max_branch_size) children,
+# divided by the number of switches the tree already has.
+#
+def _addBranches(topology, rng, root, max_branch_size, max_link_delay, max_link_loss):
+    stack = [[root, rng.randint(1, max_branch_size) // (topology.node_count - root)]]
+    while stack:
+        frame = stack[-1]
+        if frame[1] == 0:
+            stack.pop()
+            continue
+        frame[1] -= 1
+        child = topology.node_count
+        topology.node_count += 1
+        topology._addLink(rng, frame[0], child, -1, max_link_delay, max_link_loss)
+        stack.append([child, rng.randint(1, max_branch_size) // (topology.node_count - root)])
+
+
+# _addLoop( topology, rng, root, ... )
+#
+# Purpose: Add a ring of 3 to max_loop_size new switches, in random order, closed through root.
+#
+def _addLoop(topology, rng, root, max_loop_size, max_link_delay, max_link_loss):
+    ln = rng.randint(3, max_loop_size)
+    ring = list(range(topology.node_count, topology.node_count + ln))
+    rng.shuffle(ring)
+    ring.insert(0, root)
+    topology.node_count += ln
+    for i in range(ln + 1):
+        topology._addLink(rng, ring[i], ring[(i + 1) % (ln + 1)], topology.loop_count, max_link_delay,
+                          max_link_loss)
+    topology.loop_count += 1
+
+
+# reachable( adj_matrix, source )
+#
+# Purpose: Breadth first search of an adjacency matrix. Returns a list holding True for every node connected to
+# source.
+#
+def reachable(adj_matrix, source):
+    seen = [False] * len(adj_matrix)
+    seen[source] = True
+    queue = collections.deque([source])
+    while queue:
+        node = queue.popleft()
+        row = adj_matrix[node]
+        for neighbour in range(len(row)):
+            if row[neighbour] and not seen[neighbour]:
+                seen[neighbour] = True
+                queue.append(neighbour)
+    return seen
+
+
+# instantiate( topology, net, switchName, switchDpid )
+#
+# Purpose: Add the topology's switches and links to net. switchName(i) gives the name of switch i and
+# switchDpid(i), if given, its datapath ID. Returns the list of switches, switch i at index i.
+#
+def instantiate(topology, net, switchName, switchDpid=None, **switch_params):
+    switches = []
+    for i in range(topology.node_count):
+        if switchDpid is not None:
+            switch_params["dpid"] = switchDpid(i)
+        switches.append(net.addSwitch(switchName(i), **switch_params))
+    for k in range(topology.edgeCount()):
+        net.addLink(switches[topology.src[k]], switches[topology.dst[k]], **topology.linkOptions(k))
+    return switches
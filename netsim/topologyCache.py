@@ -0,0 +1,186 @@
+"""
+Canonical topology hashes and a cache of the samples simulator.py has measured.
+
+canonicalLabels() colours the switches of a topology by Weisfeiler-Lehman refinement: every switch starts with its
+degree and is repeatedly relabelled with its own label and the sorted labels of its neighbours, each paired with the
+options (bw, delay, loss, max_queue_size, use_htb) of the link to it, until the number of distinct labels stops
+growing. Isomorphic topologies with the same link options get the same labels for corresponding switches, whatever
+the switch numbering, so:
+    - the hash of the sorted labels identifies the topology (canonicalHash()),
+    - a switch's label identifies a central node and the labels of a link's ends and its options identify a cut.
+The same refinement without link options gives the topology's structure hash. Refinement can in principle give two
+non-isomorphic topologies the same hash; for the loops and branches simulator.py generates that is rare, and costs
+at most one sample that is treated as a duplicate.
+
+A TopologyCache is an sqlite3 database, shared by all worker processes, of every (topology hash, central node label,
+cut label) sample drawn so far, where it was stored and how often it was drawn. report() sums up how diverse the
+samples are. Print the report of a cache with:
+    python -m netsim cache topologies.sqlite
+
+"""
+
+import argparse
+import hashlib
+import math
+import sqlite3
+
+NO_CUT = "none"
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def linkLabel(topology, k):
+    return "%d/%d/%d/%d/%d" % (topology.bw[k], topology.delay[k], topology.loss[k], topology.max_queue_size[k],
+                               topology.use_htb[k])
+
+
+# canonicalLabels( topology, link_options )
+#
+# Purpose: Return the refined label of every switch of a topology.Topology, taking the link options into account
+# if link_options is True.
+#
+def canonicalLabels(topology, link_options=True):
+    neighbours = [[] for _ in range(topology.node_count)]
+    for k in range(topology.edgeCount()):
+        label = linkLabel(topology, k) if link_options else ""
+        neighbours[topology.src[k]].append((topology.dst[k], label))
+        neighbours[topology.dst[k]].append((topology.src[k], label))
+    labels = [str(len(links)) for links in neighbours]
+    distinct = len(set(labels))
+    for _ in range(topology.node_count):
+        labels = [_digest(labels[i] + "|" + ",".join(sorted(link + ":" + labels[j] for j, link in neighbours[i])))
+                  for i in range(topology.node_count)]
+        if len(set(labels)) == distinct:
+            break
+        distinct = len(set(labels))
+    return labels
+
+
+def _graphHash(topology, labels):
+    return hashlib.sha1(("%d/%d/" % (topology.node_count, topology.edgeCount()) +
+                         ",".join(sorted(labels))).encode("utf-8")).hexdigest()
+
+
+# canonicalHash( topology, link_options )
+#
+# Purpose: Hash of a topology that is the same for every isomorphic topology, including the link options if
+# link_options is True.
+#
+def canonicalHash(topology, link_options=True):
+    return _graphHash(topology, canonicalLabels(topology, link_options))
+
+
+###
+### Canonical form of one topology: its hashes and the labels of its central nodes and cuts.
+###
+class CanonicalTopology(object):
+    def __init__(self, topology):
+        self.topology = topology
+        self.labels = canonicalLabels(topology)
+        self.hash = _graphHash(topology, self.labels)
+        self.structure = canonicalHash(topology, link_options=False)
+
+    def centralLabel(self, central_node_index):
+        return self.labels[central_node_index]
+
+    # cutLabel( k )
+    #
+    # Purpose: Label of cutting link k of the topology, NO_CUT for k None.
+    #
+    def cutLabel(self, k):
+        if k is None:
+            return NO_CUT
+        ends = sorted([self.labels[self.topology.src[k]], self.labels[self.topology.dst[k]]])
+        return ends[0] + "-" + ends[1] + "/" + linkLabel(self.topology, k)
+
+
+class TopologyCache(object):
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.db = sqlite3.connect(file_name, timeout=60)
+        with self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS topologies (hash TEXT PRIMARY KEY, structure TEXT, "
+                            "node_count INTEGER, edge_count INTEGER, networks INTEGER)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS samples (hash TEXT, central TEXT, cut TEXT, "
+                            "location TEXT, draws INTEGER, PRIMARY KEY (hash, central, cut))")
+
+    # addTopology( canonical )
+    #
+    # Purpose: Count one more network built from a CanonicalTopology.
+    #
+    def addTopology(self, canonical):
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO topologies VALUES (?, ?, ?, ?, 0)",
+                            (canonical.hash, canonical.structure, canonical.topology.node_count,
+                             canonical.topology.edgeCount()))
+            self.db.execute("UPDATE topologies SET networks = networks + 1 WHERE hash = ?", (canonical.hash,))
+
+    # claim( canonical, central_node_index, k, location )
+    #
+    # Purpose: Record a draw of the sample with central node central_node_index and cut link k (None for no cut) of
+    # a CanonicalTopology, to be stored at location. Returns False if the sample was already claimed for another
+    # location, True if it is new or was claimed for this location before (an interrupted run measuring it again).
+    #
+    def claim(self, canonical, central_node_index, k, location):
+        key = (canonical.hash, canonical.centralLabel(central_node_index), canonical.cutLabel(k))
+        with self.db:
+            inserted = self.db.execute("INSERT OR IGNORE INTO samples VALUES (?, ?, ?, ?, 1)",
+                                       key + (location,)).rowcount
+            if inserted:
+                return True
+            self.db.execute("UPDATE samples SET draws = draws + 1 WHERE hash = ? AND central = ? AND cut = ?", key)
+            stored = self.db.execute("SELECT location FROM samples WHERE hash = ? AND central = ? AND cut = ?",
+                                     key).fetchone()[0]
+        return stored == location
+
+    # report()
+    #
+    # Purpose: Diversity of the cached samples: how many distinct topologies, structures and samples there are,
+    # how many draws were duplicates, and the effective number of topologies (the exponential of the entropy of
+    # the samples per topology, equal to the topology count when they are evenly spread).
+    #
+    def report(self):
+        samples, draws = self.db.execute("SELECT COUNT(*), COALESCE(SUM(draws), 0) FROM samples").fetchone()
+        topologies, structures, networks, min_nodes, mean_nodes, max_nodes = self.db.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT structure), COALESCE(SUM(networks), 0), MIN(node_count), "
+            "AVG(node_count), MAX(node_count) FROM topologies").fetchone()
+        entropy = 0.0
+        for count, in self.db.execute("SELECT COUNT(*) FROM samples GROUP BY hash"):
+            entropy -= count / float(samples) * math.log(count / float(samples))
+        cuts = self.db.execute("SELECT COUNT(*) FROM samples WHERE cut != ?", (NO_CUT,)).fetchone()[0]
+        return {"samples": samples,
+                "draws": draws,
+                "duplicate_draws": draws - samples,
+                "samples_with_cut": cuts,
+                "networks": networks,
+                "topologies": topologies,
+                "structures": structures,
+                "effective_topologies": math.exp(entropy) if samples else 0.0,
+                "node_count": {"min": min_nodes, "mean": mean_nodes, "max": max_nodes}}
+
+    def close(self):
+        self.db.close()
+
+
+# main( argv )
+#
+# Purpose: Print the diversity report of sample caches, the netsim cache command.
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the diversity report of topology caches")
+    parser.add_argument("caches", nargs="+")
+    args = parser.parse_args(argv)
+
+    for name in args.caches:
+        cache = TopologyCache(name)
+        report = cache.report()
+        cache.close()
+        print(name)
+        for key in sorted(report):
+            print("    %s: %s" % (key, report[key]))
+
+
+if __name__ == "__main__":
+    main()
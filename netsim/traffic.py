@@ -0,0 +1,35 @@
+"""
+Traffic schedules for simulator.py.
+
+trafficSchedule() draws every flow of a measurement up front from a seed, so the offered load is fixed before the
+network is touched and does not depend on how quickly flows can be launched. Flows arrive as a Poisson process at
+traffic_level flows per second per host, run between two different random hosts and last 1 to max_flow_duration
+seconds. A backend's startTraffic() plays a schedule on its network.
+
+"""
+
+import collections
+import random
+
+Flow = collections.namedtuple("Flow", ["start",  # s after the traffic starts
+                                       "src",  # host index
+                                       "dst",  # host index
+                                       "duration"])  # s
+
+
+# trafficSchedule( seed, host_count, duration, traffic_level, max_flow_duration )
+#
+# Purpose: Return the Flows starting within duration seconds, ordered by start time.
+#
+def trafficSchedule(seed, host_count, duration, traffic_level, max_flow_duration):
+    rng = random.Random(seed)
+    schedule = []
+    if host_count < 2 or traffic_level <= 0:
+        return schedule
+    t = 0.0
+    while True:
+        t += rng.expovariate(traffic_level * host_count)
+        if t >= duration:
+            return schedule
+        src, dst = rng.sample(range(host_count), 2)
+        schedule.append(Flow(t, src, dst, rng.randint(1, max_flow_duration)))
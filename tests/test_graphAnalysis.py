@@ -0,0 +1,43 @@
+import random
+
+from netsim import graphAnalysis
+from netsim import topology
+
+
+# Switches reachable from root over every link but cut, by a breadth first search
+def reachable(network, root, cut=None):
+    adjacency = [[] for _ in range(network.node_count)]
+    for k, (i, j) in enumerate(network.edges()):
+        if k != cut:
+            adjacency[i].append(j)
+            adjacency[j].append(i)
+    seen = {root}
+    frontier = [root]
+    while frontier:
+        frontier = [j for i in frontier for j in adjacency[i] if j not in seen and not seen.add(j)]
+    return seen
+
+
+def test_bridges_and_expected_alarms_match_brute_force():
+    rng = random.Random(22)
+    for _ in range(200):
+        network = topology.generateTopology(rng.randrange(2 ** 32), min_node=5, max_node=40)
+        root = rng.randrange(network.node_count)
+        analysis = graphAnalysis.CutAnalysis(network, root)
+        connected = reachable(network, root)
+        assert analysis.expectedAlarms(None) == [0 if j in connected else 1 for j in range(network.node_count)]
+        for k in range(network.edgeCount()):
+            after = reachable(network, root, k)
+            assert bool(analysis.is_bridge[k]) == (after != connected), k
+            assert sorted(analysis.disconnected(k)) == sorted(connected - after), k
+            assert analysis.expectedAlarms(k) == [0 if j in after else 1 for j in range(network.node_count)], k
+        assert sorted(analysis.bridges + analysis.cycle_links) == list(range(network.edgeCount()))
+
+
+def test_sample_cut_draws_from_the_requested_class():
+    rng = random.Random(1)
+    network = topology.generateTopology(7)
+    analysis = graphAnalysis.CutAnalysis(network)
+    assert analysis.bridges and analysis.cycle_links
+    assert all(analysis.is_bridge[graphAnalysis.sampleCut(rng, analysis, 1.0)] for _ in range(50))
+    assert not any(analysis.is_bridge[graphAnalysis.sampleCut(rng, analysis, 0.0)] for _ in range(50))
@@ -0,0 +1,42 @@
+import heapq
+import random
+
+import pytest
+
+from netsim import latencyOracle
+from netsim import topology
+
+
+# Round trip latencies from source over every link but cut, by a full Dijkstra
+def dijkstraLatencies(network, source, cut=None):
+    adjacency = [[] for _ in range(network.node_count)]
+    for k, (i, j) in enumerate(network.edges()):
+        if k != cut:
+            adjacency[i].append((j, network.delay[k]))
+            adjacency[j].append((i, network.delay[k]))
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    while heap:
+        d, node = heapq.heappop(heap)
+        if d > dist[node]:
+            continue
+        for neighbour, weight in adjacency[node]:
+            if neighbour not in dist or d + weight < dist[neighbour]:
+                dist[neighbour] = d + weight
+                heapq.heappush(heap, (d + weight, neighbour))
+    latencies = [2.0 * dist[j] if j in dist and j != source else 0.0 for j in range(network.node_count)]
+    return latencies, [0 if j in dist else 1 for j in range(network.node_count)]
+
+
+def test_after_cut_matches_a_full_dijkstra_for_every_cut():
+    rng = random.Random(6)
+    for _ in range(300):
+        network = topology.generateTopology(rng.randrange(2 ** 32), min_node=5, max_node=40)
+        central = rng.randrange(network.node_count)
+        oracle = latencyOracle.LatencyOracle.fromTopology(network, central)
+        assert oracle.latencies() == pytest.approx(dijkstraLatencies(network, central)[0])
+        edges = network.edges()
+        for k, ((latencies, disconnected), edge) in enumerate(zip(oracle.batchAfterCut(edges), edges)):
+            expected_latencies, expected_disconnected = dijkstraLatencies(network, central, k)
+            assert latencies == pytest.approx(expected_latencies), edge
+            assert disconnected == expected_disconnected, edge
@@ -0,0 +1,115 @@
+import os
+import random
+
+from netsim import dataDecoder
+from netsim import dataFormat
+from netsim import shardJournal
+from netsim import topology
+
+PARAMETERS = {"TIME_BETWEEN_PINGS": 30,
+              "PINGS_PER_WINDOW": 4,
+              "WINDOW_COUNT": 3,
+              "LINK_CUT_WINDOW": 1,
+              "MAX_TRAFFIC_DURATION": 5}
+
+
+# Record rows of generated networks with one loop link cut. Latencies are multiples of 1/4 so the float32 of an
+# .nsd shard holds them exactly.
+def recordRows(count, seed=1):
+    rng = random.Random(seed)
+    rows = []
+    while len(rows) < count:
+        network = topology.generateTopology(rng.randrange(2 ** 32), min_node=5, max_node=30)
+        if not network.loopEdges():
+            continue
+        n = network.node_count
+        adj_matrix = network.adjacencyMatrix()
+        failure_adj_matrix = [list(row) for row in adj_matrix]
+        i, j = network.edges()[rng.choice(network.loopEdges())]
+        failure_adj_matrix[i][j] = failure_adj_matrix[j][i] = 0
+        alarm_list = [rng.randint(0, 1) for _ in range(n)]
+        latency_list = [rng.randrange(400) / 4.0 for _ in range(n * PARAMETERS["WINDOW_COUNT"])]
+        rows.append(dataFormat.csvRow(n, rng.randrange(n), alarm_list, latency_list, adj_matrix, failure_adj_matrix))
+    return rows
+
+
+def writeShard(file_name, rows):
+    shard = shardJournal.StreamingShard(file_name, PARAMETERS)
+    for index, row in enumerate(rows):
+        shard.add(index, row)
+    shard.close()
+    return file_name
+
+
+def test_generate_topology_is_deterministic():
+    first = topology.generateTopology(1234)
+    second = topology.generateTopology(1234)
+    assert first.seed == second.seed == 1234
+    assert first.node_count == second.node_count
+    assert first.edges() == second.edges()
+    assert first.loopEdges() == second.loopEdges()
+    assert [first.linkOptions(k) for k in range(first.edgeCount())] == \
+        [second.linkOptions(k) for k in range(second.edgeCount())]
+    assert topology.generateTopology(1235).edges() != first.edges()
+
+
+def test_csv_and_nsd_hold_the_same_records(tmp_path):
+    rows = recordRows(5)
+    csv_name = writeShard(str(tmp_path / "dataWLatency1t0.csv"), rows)
+    nsd_name = dataFormat.convertCsv(csv_name, chunk_records=2)
+
+    from_csv = list(dataDecoder.decodeFile(csv_name))
+    from_nsd = list(dataDecoder.decodeFile(nsd_name))
+    assert len(from_csv) == len(rows)
+    assert from_csv == from_nsd
+    assert dataDecoder.findShards(str(tmp_path)) == [nsd_name]
+
+
+def test_merged_csv_and_nsd_hold_the_same_records(tmp_path):
+    rows = recordRows(6)
+    names = [writeShard(str(tmp_path / ("dataWLatency1t%d.csv" % t)), rows[3 * t:3 * t + 3]) for t in range(2)]
+
+    merged_csv = str(tmp_path / "merged.csv")
+    merged_nsd = str(tmp_path / "merged.nsd")
+    assert dataDecoder.mergeShards(names, merged_csv) == len(rows)
+    assert dataDecoder.mergeShards(names, merged_nsd) == len(rows)
+    assert dataDecoder.readHeader(merged_csv)["SIMULATION_COUNT"] == len(rows)
+    assert list(dataDecoder.decodeFile(merged_csv)) == list(dataDecoder.decodeFile(merged_nsd))
+
+
+def test_streaming_shard_resumes_after_a_truncated_write(tmp_path):
+    rows = recordRows(4)
+    for extension in [".csv", dataFormat.EXTENSION]:
+        name = str(tmp_path / ("dataWLatency1t0" + extension))
+        shard = shardJournal.StreamingShard(name, PARAMETERS)
+        shard.add(0, rows[0])
+        shard.add(1, None)
+        shard.add(2, rows[2])
+        shard.detach()
+        # Cut the last record short, as a crash in the middle of its write would
+        with open(name, "r+b") as f:
+            f.truncate(os.path.getsize(name) - 7)
+        assert shardJournal.completedSimulations(name, PARAMETERS) == {0, 1}
+
+        shard = shardJournal.StreamingShard(name, PARAMETERS)
+        assert shard.completed == {0, 1}
+        assert shard.record_count == 1
+        shard.add(2, rows[2])
+        shard.add(3, rows[3])
+        shard.close()
+
+        assert shardJournal.isComplete(name)
+        assert not os.path.exists(shardJournal.journalName(name))
+        expected = writeShard(str(tmp_path / ("expected" + extension)), [rows[0], None, rows[2], rows[3]])
+        assert list(dataDecoder.decodeFile(name)) == list(dataDecoder.decodeFile(expected))
+
+
+def test_parallel_decoding_yields_the_records_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataDecoder, "PIECE_RECORDS", 2)
+    rows = recordRows(7)
+    csv_name = writeShard(str(tmp_path / "dataWLatency1t0.csv"), rows)
+    nsd_name = dataFormat.convertCsv(csv_name, str(tmp_path / "dataWLatency2t0.nsd"), chunk_records=3)
+    names = [csv_name, nsd_name, csv_name]
+    expected = [record for name in names for record in dataDecoder.decodeFile(name)]
+    assert list(dataDecoder.decodeShards(names, 1)) == expected
+    assert list(dataDecoder.decodeShards(names, 3)) == expected
@@ -0,0 +1,29 @@
+import pytest
+
+from netsim import probeSamples
+
+
+# One round of results for node_count nodes; node n of round r answers with an RTT of 10 * r + n ms
+def roundResults(r, node_count):
+    return [(1, 1, 10.0 * r + n, 10.0 * r + n, 10.0 * r + n, 0.0) for n in range(node_count)]
+
+
+def test_sample_buffer_wraps_around_keeping_the_newest_rounds(tmp_path):
+    buffer = probeSamples.SampleBuffer(2, 3)
+    for r in range(7):
+        buffer.add(float(r), roundResults(r, 2))
+    assert buffer.rounds == 7
+    assert buffer.available() == 3
+    for n in range(2):
+        assert list(buffer.column(probeSamples.RTTAVG, 4, 3, n)) == [40.0 + n, 50.0 + n, 60.0 + n]
+        assert list(buffer.column(probeSamples.TIMESTAMP, 5, 2, n)) == [5.0, 6.0]
+    with pytest.raises(IndexError):
+        buffer.column(probeSamples.RTTAVG, 3, 2, 0)
+    assert buffer.windowStatistics(4, 3)[1][0] == pytest.approx(51.0)
+
+    file_name = str(tmp_path / "dataWLatency1t0.samples")
+    probeSamples.appendSamples(file_name, 0, buffer)
+    read = probeSamples.readSamples(file_name)[0]
+    assert read.rounds == 3
+    for n in range(2):
+        assert list(read.column(probeSamples.RTTAVG, 0, 3, n)) == [40.0 + n, 50.0 + n, 60.0 + n]
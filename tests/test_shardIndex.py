@@ -0,0 +1,32 @@
+import random
+
+from netsim import dataDecoder
+from netsim import dataFormat
+from netsim import shardIndex
+
+from test_netsim import recordRows, writeShard
+
+
+def test_decode_record_matches_decode_chunk(tmp_path):
+    csv_name = writeShard(str(tmp_path / "dataWLatency1t0.csv"), recordRows(9))
+    reader = dataFormat.ShardReader(dataFormat.convertCsv(csv_name, chunk_records=4))
+    for count, payload in reader.chunks():
+        records = list(reader.decodeChunk(count, payload))
+        assert [reader.decodeRecord(count, payload, position) for position in range(count)] == records
+
+
+def test_dataset_reader_fetches_every_record_with_few_files_open(tmp_path, monkeypatch):
+    monkeypatch.setattr(shardIndex, "MAX_OPEN_FILES", 2)
+    rows = recordRows(12)
+    names = []
+    for t in range(4):
+        name = writeShard(str(tmp_path / ("dataWLatency1t%d.csv" % t)), rows[3 * t:3 * t + 3])
+        names.append(dataFormat.convertCsv(name, chunk_records=2) if t % 2 else name)
+    expected = [record for name in names for record in dataDecoder.decodeFile(name)]
+
+    order = list(range(len(expected)))
+    random.Random(3).shuffle(order)
+    with shardIndex.DatasetReader(names) as reader:
+        for i in order:
+            assert reader[i] == expected[i]
+            assert len(reader.files) <= 2
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from netsim import analyticNet
+from netsim import controllerPool
+from netsim import simulator
+
+
+# A network whose clock only moves when it sleeps, answering every probe
+class ClockNetwork(object):
+    def __init__(self):
+        self.clock = 0.0
+        self.probe_times = []
+
+    def now(self):
+        return self.clock
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.clock += seconds
+
+    def probeHosts(self, source, targets, timeout='1', count=1):
+        self.probe_times.append(self.clock)
+        return [(count, count, 1.0, 1.0, 1.0, 0.0) for _ in targets]
+
+
+def test_link_cut_happens_when_its_window_starts():
+    network = ClockNetwork()
+    engine = simulator.ProbeEngine(network, "h0", ["h1", "h2"])
+    window_starts = []
+    engine.run(lambda i: window_starts.append(network.now()))
+
+    window_length = simulator.PINGS_PER_WINDOW * simulator.TIME_BETWEEN_PINGS
+    assert window_starts == [i * window_length for i in range(simulator.WINDOW_COUNT)]
+    assert network.probe_times == [k * simulator.TIME_BETWEEN_PINGS
+                                   for k in range(simulator.WINDOW_COUNT * simulator.PINGS_PER_WINDOW)]
+    # The first probe of the window after the cut is taken right after the cut
+    cut_time = window_starts[simulator.LINK_CUT_WINDOW]
+    assert network.probe_times[simulator.LINK_CUT_WINDOW * simulator.PINGS_PER_WINDOW] == cut_time
+    assert len(engine.window_statistics) == simulator.WINDOW_COUNT
+
+
+def test_a_failed_measurement_stops_the_traffic_and_releases_the_controller(monkeypatch):
+    monkeypatch.setattr(simulator, "BACKEND", "analytic")
+    monkeypatch.setattr(simulator, "PREDICT_ALARMS", False)
+    stopped = []
+    monkeypatch.setattr(analyticNet.AnalyticTraffic, "stop", lambda traffic: stopped.append(traffic))
+
+    def fail(*args):
+        raise RuntimeError("measuring failed")
+
+    monkeypatch.setattr(simulator.Simulator, "detectLinkFaults", fail)
+    random.seed(1)
+    worker = simulator.Simulator(0)
+    with pytest.raises(RuntimeError):
+        while True:
+            worker.simulate(0, 0, 0)
+    assert len(stopped) == 1
+    assert not worker.network_running
+    assert worker.controllers.get(0, controllerPool.ACTIVE_SWITCHES) == 0
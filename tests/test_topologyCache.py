@@ -0,0 +1,47 @@
+import random
+
+from netsim import topology
+from netsim import topologyCache
+
+LINK_FIELDS = ["bw", "delay", "loss", "max_queue_size", "use_htb", "loop"]
+
+
+# The same network with its switches renumbered by permutation and its links listed in order
+def relabel(network, permutation, order):
+    copy = topology.Topology(network.seed)
+    copy.node_count = network.node_count
+    for k in order:
+        copy.src.append(permutation[network.src[k]])
+        copy.dst.append(permutation[network.dst[k]])
+        for field in LINK_FIELDS:
+            getattr(copy, field).append(getattr(network, field)[k])
+    return copy
+
+
+def test_canonical_hash_is_the_same_for_isomorphic_topologies():
+    rng = random.Random(21)
+    for _ in range(50):
+        network = topology.generateTopology(rng.randrange(2 ** 32), min_node=5, max_node=40)
+        permutation = list(range(network.node_count))
+        rng.shuffle(permutation)
+        order = list(range(network.edgeCount()))
+        rng.shuffle(order)
+        copy = relabel(network, permutation, order)
+
+        original = topologyCache.CanonicalTopology(network)
+        relabelled = topologyCache.CanonicalTopology(copy)
+        assert relabelled.hash == original.hash
+        assert relabelled.structure == original.structure
+        for node in range(network.node_count):
+            assert relabelled.centralLabel(permutation[node]) == original.centralLabel(node)
+        for position, k in enumerate(order):
+            assert relabelled.cutLabel(position) == original.cutLabel(k)
+
+
+def test_canonical_hash_tells_link_options_apart():
+    network = topology.generateTopology(5)
+    changed = relabel(network, list(range(network.node_count)), list(range(network.edgeCount())))
+    changed.delay[0] += 1
+    assert topologyCache.canonicalHash(changed) != topologyCache.canonicalHash(network)
+    assert topologyCache.canonicalHash(changed, link_options=False) == \
+        topologyCache.canonicalHash(network, link_options=False)